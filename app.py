@@ -2,19 +2,14 @@
 
 import customtkinter as ctk
 import threading
-import speech_recognition as sr
-import whisper
-from llama_cpp import Llama
+import queue
+import multiprocessing
 import os
-from pathlib import Path
 import json
 from datetime import datetime
 
 from piper.voice import PiperVoice
-import sounddevice as sd
 import numpy as np
-from pydub import AudioSegment
-from pydub.playback import play
 import time
 
 import prompts
@@ -23,27 +18,80 @@ import interview_analyzer
 import feedback_manager
 
 import interview_flow_manager
+from inference_server import InferenceClient, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+import intent_router
+import spoken_parsing
+from response_cache import ResponseCache
+from history_manager import InterviewHistoryWindow
+from model_loader import ModelLoader
+from audio_cues import CueBank, decode_wav
+from audio_output import AudioMixer, CHANNEL_CUES, CHANNEL_SPEECH
+from tts_cache import TtsCache
+from tts_pipeline import SpeechPipeline, split_sentences
+from asr_backends import load_asr_backend
+from asr_router import AsrRouter, ASR_MODE_ANSWER, ASR_MODE_COMMAND
+from capture_service import CaptureService, COMMAND_POLICY, ANSWER_POLICY, INTERVIEW_POLICY
+from streaming_asr import StreamingTranscriber
+from wake_word import WakeWordSpotter, ListenerCpuMeter, strip_wake_phrase
+from sentence_stream import SentenceSegmenter
+from write_behind import WriteBehindQueue
 
 import database_manager as db
 from ui_components import WelcomeFrame, AdminDashboard, MainAppFrame
-import os
-import sys
-
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-
-    return os.path.join(base_path, relative_path)
+from resources import resource_path
+from tts_config import PIPER_MODEL_PATH, TTS_CACHE_ENABLED, TTS_CACHE_MAX_CHARS, WAKE_WORD_HINT
 
 # --- Constants ---
 MODEL_PATH = resource_path("./model/gemma-3n-e2b-it.Q2_K_M.gguf")
-PIPER_MODEL_PATH = resource_path("./model/en_US-hfc_female-medium.onnx")
+
+# Speech recognition backend: "torch" (openai-whisper) or "onnx" (the int8 exports
+# written by export_whisper_onnx.py, which don't need torch at runtime). Which
+# model each call site uses is set by asr_router.ASR_PROFILES.
+ASR_BACKEND = "torch"
+WHISPER_ONNX_DIR = resource_path("./model/whisper-{model}-int8")
 
 MAX_ONBOARDING_TURNS = 4
 
+GEMMA_N_CTX = 2048
+INTERVIEW_RESPONSE_TOKENS = 250
+# Question/answer pairs kept verbatim in interview prompts; older turns are summarized.
+INTERVIEW_VERBATIM_TURNS = 3
+# Rough characters per Gemma token, for budgeting prompts while the inference worker is down.
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+# Personas whose static prompt head is snapshotted in the KV cache at load time.
+PREFIX_CACHED_PERSONAS = [
+    "ONBOARDING_SPECIALIST", "NAVIGATION_ASSISTANT", "SUMMARIZER",
+    "FEEDBACK_COACH", "EXIT_DETECTOR", "ORDINAL_SELECTOR",
+]
+PERSIST_PREFIX_CACHE = True
+
+# Opt-in cache of identical prompts' completions (memory LRU + table in profiles.db).
+RESPONSE_CACHE_ENABLED = False
+
+# Longest a read waits for queued history/feedback writes before going ahead without them.
+PERSISTENCE_FLUSH_TIMEOUT_S = 5.0
+
+GEMMA_STOP = ["</s>", "[INST]", "User:", "Assistant:"]
+# Extra sampling keyword arguments for llama.cpp; empty means the library defaults.
+GEMMA_SAMPLING = {}
+
+# Number of extra llama.cpp contexts used to score answers in parallel (None = sized to the core count).
+ANALYSIS_POOL_SIZE = None
+
+# Only utterances opening with "Pragati" reach Whisper in the command listener.
+# Templates are spoken by Piper; 16-bit WAV recordings of real students saying
+# the wake phrase can be dropped into WAKE_WORD_DIR to make the gate more reliable.
+WAKE_WORD_ENABLED = True
+WAKE_WORD_DIR = resource_path("./assets/wake_word")
+
+# Students can start answering while a question is still being spoken: the
+# microphone stays open during playback (with the app's own voice suppressed),
+# and their first words cut the speech off and become the start of the answer.
+# Off until the echo calibration in capture_service has been tried on real
+# speakers and rooms; with it off, listening starts after the prompt ends.
+BARGE_IN_ENABLED = False
+
 # --- Centralized Audio Path Manager ---
 AUDIO_PATHS = {
     # Startup & Login
@@ -91,6 +139,19 @@ AUDIO_PATHS = {
     "beep": resource_path("./assets/audio/other/beep.wav"),
 }
 
+# Decoded cues are packed into this memory-mapped file after the first run (None to always decode).
+CUE_PACK_PATH = "audio_cues.npy"
+
+
+def piper_sample_rate(model_path=PIPER_MODEL_PATH, default=22050):
+    """Reads the voice's output rate from its .onnx.json config, without loading the voice."""
+    try:
+        with open(model_path + ".json", encoding="utf-8") as f:
+            return int(json.load(f)["audio"]["sample_rate"])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"AUDIO_PLAYER_ERROR: Could not read the Piper sample rate ({e}); assuming {default} Hz.")
+        return default
+
 # --- AI Personas ---
 AI_PERSONAS = {
     "ONBOARDING_SPECIALIST": """
@@ -198,15 +259,52 @@ class App(ctk.CTk):
         self.feedback_listener_stop_event = None
         self.in_feedback_mode = False
 
-        self.whisper_model, self.gemma_model = None, None
-        self.piper_voice = None
-        self.recognizer = sr.Recognizer()
-        self.recognizer.pause_threshold = 2.0
-        self.microphone = sr.Microphone()
+        self.response_cache = None
+        # Opened up front rather than with the voice, so cached phrases can be
+        # spoken while Piper is still loading.
+        self.tts_cache = TtsCache(PIPER_MODEL_PATH) if TTS_CACHE_ENABLED else None
+        # Set whenever no interactive Gemma request is in flight; background scoring waits on it.
+        self.llm_idle = threading.Event()
+        self.llm_idle.set()
+        self.interactive_requests = 0
+        self.interactive_requests_lock = threading.Lock()
+        # One mixer owns the output device at Piper's rate; cues are decoded and
+        # resampled to that rate once, up front, so speech and cues share it.
+        output_rate = piper_sample_rate()
+        self.cue_bank = CueBank(AUDIO_PATHS, sample_rate=output_rate, pack_path=CUE_PACK_PATH)
+        # If the output device can't be opened now, the next cue or sentence tries again.
+        self.audio_mixer = AudioMixer(output_rate)
+        try:
+            self.audio_mixer.start()
+        except Exception as e:
+            print(f"AUDIO_PLAYER_ERROR: Could not open the output device, will retry on playback: {e}")
+        # One microphone stream for the whole session; each listener subscribes
+        # with its own end-of-speech policy instead of retuning a shared recognizer.
+        # If it can't be opened now, the next subscribe() tries again.
+        self.capture = CaptureService()
+        try:
+            self.capture.start()
+        except Exception as e:
+            print(f"CAPTURE_ERROR: Could not open the microphone, will retry when listening: {e}")
+        self.capture.echo_reference = self.audio_mixer.played_level_db
+        self.speech_interrupted = threading.Event()
+        # History and feedback writes are committed in batches by a worker; reads
+        # that must see them call self.persistence.flush() first.
+        self.persistence = WriteBehindQueue()
 
         self.stop_listening_event = None
+        self.wake_word_spotter = None
+        self.wake_word_built = False
+        self.wake_word_lock = threading.Lock()
 
-        threading.Thread(target=lambda: self.play_audio("app_startup"), daemon=True).start()
+        # All three models start loading right away, while the welcome screen is up.
+        self.model_states = {}
+        self.model_loader = ModelLoader(on_progress=self._on_model_progress)
+        self.model_loader.start("whisper", "Speech model", self._load_whisper)
+        self.model_loader.start("gemma", "Gemma AI", self._load_gemma)
+        self.model_loader.start("piper", "Voice model", self._load_piper)
+
+        self.play_audio("app_startup", blocking=False)
 
         self.show_welcome_screen()
 
@@ -247,16 +345,39 @@ class App(ctk.CTk):
 
     def show_welcome_screen(self):
         self.show_frame(WelcomeFrame, login_callback=self.login_user)
+        self._show_model_progress()
 
     def login_user(self, username):
-        user_data = db.get_user_by_username(username)
+        def read():
+            user_data = db.get_user_by_username(username)
+            return user_data, db.get_conversation_history(user_data['id']) if user_data else []
+
+        self._read_after_flush(read, lambda result: self._finish_login(*result))
+
+    def _finish_login(self, user_data, history):
         if user_data:
             self.play_audio("login_success")
             self.current_user = user_data
             self.current_user['preferences'] = json.loads(self.current_user['preferences'])
-            self.conversation_history = db.get_conversation_history(self.current_user['id'])
+            self.conversation_history = history
             self.transition_to_main_app()
 
+    def _read_after_flush(self, read, apply):
+        """
+        Waits for queued history and feedback writes and calls `read` on a worker
+        thread, so the window stays responsive, then passes its result to `apply`
+        on the Tk thread. If the writes haven't landed within
+        PERSISTENCE_FLUSH_TIMEOUT_S the read goes ahead and the status line says so.
+        """
+        def worker():
+            flushed = self.persistence.flush(PERSISTENCE_FLUSH_TIMEOUT_S)
+            result = read()
+            if not flushed:
+                self.update_status("Still saving recent changes; they may not show here yet.")
+            self.after(0, apply, result)
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def logout_and_return_to_welcome(self):
         if self.stop_listening_event:
             print("DEBUG: Setting stop event for listener thread.")
@@ -270,6 +391,8 @@ class App(ctk.CTk):
 
         self.stop_listening_event = None
         self.background_listener_thread = None
+        if self.model_loader.is_ready("gemma"):
+            self.gemma_model.cancel_all()
         self.play_audio("logout_confirmation")
         self.app_state = None
         self.current_user = None
@@ -302,39 +425,111 @@ class App(ctk.CTk):
 
     def speak(self, text):
         """Synthesizes and plays audio, ensuring it completes fully."""
-        if not self.piper_voice or not text or not text.strip():
+        if not text or not text.strip() or self.speech_interrupted.is_set():
             return
-        
-        def audio_task():
-            try:
-                self._show_speaking_indicator()
-                self.update_status("Speaking...")
-                samplerate = self.piper_voice.config.sample_rate
-                with sd.OutputStream(samplerate=samplerate, channels=1, dtype='int16') as stream:
-                    for audio_chunk in self.piper_voice.synthesize(text):
-                        stream.write(audio_chunk.audio_int16_array)
-            except Exception as e:
-                print(f"Piper TTS playback error: {e}")
-                print("DEBUG: The speak() function failed. This is likely an audio device conflict.")
-            finally:
+
+        # Look in the cache before touching piper_voice, which waits for the model to load.
+        cacheable = self.tts_cache is not None and len(text) <= TTS_CACHE_MAX_CHARS
+        cached = self.tts_cache.get(text) if cacheable else None
+        if cached is None and not self.piper_voice:
+            return
+        try:
+            self._show_speaking_indicator()
+            self.update_status("Speaking...")
+            if cached is not None:
+                self.audio_mixer.play(cached, CHANNEL_SPEECH).result()
+                return
+
+            rendered = self._play_sentences(split_sentences(text))
+            if cacheable and rendered and not self.speech_interrupted.is_set():
+                self.tts_cache.put(text, np.concatenate(rendered))
+        except Exception as e:
+            print(f"Piper TTS playback error: {e}")
+        finally:
+            self._hide_speaking_indicator()
+
+    def _speech_pipeline(self):
+        """A TTS pipeline that synthesizes the next sentence while the current one plays."""
+        voice = self.piper_voice
+        return SpeechPipeline(
+            lambda text: (chunk.audio_int16_array for chunk in voice.synthesize(text)),
+            lambda samples: self.audio_mixer.play(samples, CHANNEL_SPEECH),
+            self.audio_mixer.sample_rate
+        )
+
+    def _play_sentences(self, sentences):
+        """Speaks sentences until they run out or the student barges in. Returns the rendered audio."""
+        rendered = self._speech_pipeline().run(sentences, stop=self.speech_interrupted)
+        if self.speech_interrupted.is_set():
+            # A sentence handed to the mixer just as the student cut in may still be queued.
+            self.audio_mixer.stop(CHANNEL_SPEECH)
+        return rendered
+
+    def _speak_sentences(self, sentence_queue):
+        """
+        Speaks sentences from a queue as they arrive, until a None sentinel is received.
+        """
+        started = []
+        sentinel_seen = []
+
+        def sentences():
+            while True:
+                sentence = sentence_queue.get()
+                if sentence is None:
+                    sentinel_seen.append(True)
+                    return
+                text = self._sanitize_for_speech(sentence)
+                if not text or not self.piper_voice:
+                    continue
+                if not started:
+                    started.append(True)
+                    self._show_speaking_indicator()
+                    self.update_status("Speaking...")
+                yield text
+
+        try:
+            if self.piper_voice:
+                self._play_sentences(sentences())
+        except Exception as e:
+            print(f"Piper TTS streaming playback error: {e}")
+        finally:
+            # Drain the queue so the producer never waits on a dead speaker. After
+            # a barge-in the pipeline's worker may still be reading it, so leave it.
+            if not sentinel_seen and not self.speech_interrupted.is_set():
+                while sentence_queue.get() is not None:
+                    pass
+            if started:
                 self._hide_speaking_indicator()
-        
-        audio_thread = threading.Thread(target=audio_task)
-        audio_thread.start()
-        audio_thread.join()
 
-    def play_audio(self, audio_key: str):
-        """Plays an audio file by its logical name and logs the action."""
+    def _stream_gemma_to_speech(self, full_prompt, max_tokens=150):
+        """
+        Streams a Gemma response and speaks each sentence as soon as it is complete,
+        while later tokens are still decoding. Returns the full response text.
+        """
+        sentence_queue = queue.Queue()
+        speaker_thread = threading.Thread(target=self._speak_sentences, args=(sentence_queue,))
+        speaker_thread.start()
+        try:
+            return self._process_gemma_response(full_prompt, max_tokens=max_tokens, on_sentence=sentence_queue.put)
+        finally:
+            sentence_queue.put(None)
+            speaker_thread.join()
+
+    def play_audio(self, audio_key: str, blocking=True):
+        """
+        Plays a preloaded cue by its logical name and logs the action. With
+        blocking=False it returns as soon as the cue is queued.
+        """
         print(f"AUDIO_PLAYER: Attempting to play '{audio_key}'...")
         try:
-            path = AUDIO_PATHS[audio_key]
-            sound = AudioSegment.from_wav(path)
-            play(sound)
-            print(f"AUDIO_PLAYER: Successfully played '{audio_key}'.")
+            played = self.audio_mixer.play(self.cue_bank.get(audio_key), CHANNEL_CUES)
+            if blocking:
+                played.result()
+            print(f"AUDIO_PLAYER: Successfully {'played' if blocking else 'queued'} '{audio_key}'.")
         except KeyError:
             print(f"AUDIO_PLAYER_ERROR: Audio key '{audio_key}' not found in AUDIO_PATHS.")
         except FileNotFoundError:
-            print(f"AUDIO_PLAYER_ERROR: File not found at path: {path}")
+            print(f"AUDIO_PLAYER_ERROR: File not found at path: {AUDIO_PATHS[audio_key]}")
             self.speak("A required audio file could not be found.")
         except Exception as e:
             print(f"AUDIO_PLAYER_ERROR: Could not play '{audio_key}'. Reason: {e}")
@@ -342,8 +537,7 @@ class App(ctk.CTk):
     def play_audio_file(self, path):
         """DEPRECATED but kept for compatibility. Plays a single audio file by its direct path."""
         try:
-            sound = AudioSegment.from_wav(path)
-            play(sound)
+            self.audio_mixer.play(decode_wav(path, self.cue_bank.sample_rate), CHANNEL_CUES).result()
         except FileNotFoundError:
             print(f"Warning: Audio file not found at {path}")
             self.play_audio("error_file_not_found")
@@ -351,46 +545,54 @@ class App(ctk.CTk):
             print(f"Error playing audio file {path}: {e}")
 
 
-    def listen_after_prompt(self, prompt_text=""):
+    def listen_after_prompt(self, prompt_text="", policy=ANSWER_POLICY, asr_mode=ASR_MODE_ANSWER, subscription=None):
         """
         Plays a prompt, then enters a dedicated loop to wait for and record a user's full answer.
-        This function now contains ALL the important timing settings to prevent interruptions.
+        `policy` decides how long a pause ends the answer and how long to wait for it to start;
+        `asr_mode` picks the Whisper model and decoding used to transcribe it. `subscription`
+        is a listener from _open_barge_in() that was already open while the prompt was spoken.
         """
+        if subscription is None and prompt_text:
+            subscription = self._open_barge_in(policy)
         if prompt_text:
             self.speak(prompt_text)
 
-        pause_duration = 1.5  
-        max_record_time = 300
-        initial_timeout = 30
+        print(f"DEBUG: Listener settings: {policy}")
 
-        print(f"DEBUG: Listener settings: pause_threshold={pause_duration}s, phrase_limit={max_record_time}s")
-
-        self.play_audio("beep")
+        interrupted = self.speech_interrupted.is_set()
+        if subscription is not None and not interrupted:
+            # Nobody talked over the prompt, so listen from the beep as usual
+            # rather than pick up noise from while the app was speaking.
+            subscription.close()
+            subscription = None
+        if not interrupted:
+            self.play_audio("beep")
         self.update_status("Listening...")
 
         try:
             self._show_speaking_indicator()
-            while True:
-                try:
-                    self.recognizer.pause_threshold = pause_duration
-
-                    with self.microphone as source:
-                        audio_data = self.recognizer.listen(
-                            source,
-                            timeout=initial_timeout,
-                            phrase_time_limit=max_record_time
-                        )
-                    
+            with subscription or self.capture.subscribe(policy, stream=True) as subscription:
+                while True:
+                    # Long answers are transcribed window by window while the
+                    # student is still talking; only the tail is left at the end.
+                    transcriber = StreamingTranscriber(
+                        lambda audio, prompt: self._transcribe_window(audio, prompt, asr_mode),
+                        on_partial=self.update_transcript
+                    )
+                    try:
+                        audio = subscription.next_utterance(on_chunk=transcriber.feed)
+                    except Exception:
+                        transcriber.finish()
+                        raise
+
+                    if audio is None:
+                        transcriber.finish()
+                        self.update_status("Listening...")
+                        continue
+
                     self._hide_speaking_indicator()
                     self.update_status("Transcribing...")
-                    wav_data = audio_data.get_wav_data()
-                    temp_audio_path = Path("temp_audio.wav")
-                    with open(temp_audio_path, "wb") as f:
-                        f.write(wav_data)
-
-                    result = self.whisper_model.transcribe(str(temp_audio_path), fp16=False)
-                    user_input = result['text'].strip()
-                    os.remove(temp_audio_path)
+                    user_input = transcriber.finish()
 
                     if user_input:
                         self.update_transcript(user_input)
@@ -398,49 +600,143 @@ class App(ctk.CTk):
                     else:
                         self.update_status("Listening...")
                         continue
-
-                except sr.WaitTimeoutError:
-                    self.update_status("Listening...")
-                    continue
-                except sr.UnknownValueError:
-                    self.update_status("Listening...")
-                    continue
-                except Exception as e:
-                    print(f"An unexpected error occurred during listening: {e}")
-                    self.play_audio("error_microphone")
-                    return ""
+        except Exception as e:
+            print(f"An unexpected error occurred during listening: {e}")
+            self.play_audio("error_microphone")
+            return ""
         finally:
             self._hide_speaking_indicator()
+            self.speech_interrupted.clear()
 
+    def _open_barge_in(self, policy):
+        """
+        Starts listening before a prompt is spoken, so the student can answer over
+        it. Pass the result to listen_after_prompt(). Returns None if barge-in is off.
+        """
+        if not BARGE_IN_ENABLED or not self.capture.running or not self.audio_mixer.running:
+            return None
+        self.speech_interrupted.clear()
+        return self.capture.subscribe(policy, stream=True, on_onset=self._barge_in)
+
+    def _close_barge_in(self, subscription):
+        """Closes a barge-in listener that won't be handed to listen_after_prompt()."""
+        if subscription is not None:
+            subscription.close()
+        self.speech_interrupted.clear()
+
+    def _barge_in(self):
+        """Speech onset, from the capture thread: cuts off the prompt if it is still playing."""
+        if self.speech_interrupted.is_set() or not self.audio_mixer.is_busy(CHANNEL_SPEECH):
+            return
+        self.speech_interrupted.set()
+        self.audio_mixer.stop(CHANNEL_SPEECH)
+        print("BARGE_IN: Student started speaking; stopped the prompt.")
+
+
+    def _transcribe(self, audio, mode=ASR_MODE_ANSWER):
+        """Transcribes a captured 16 kHz float32 utterance straight from memory."""
+        return self._loaded_whisper().transcribe(audio, mode=mode)
+
+    def _transcribe_window(self, audio, prompt, mode=ASR_MODE_ANSWER):
+        """Transcribes one streamed window, with the text so far as context."""
+        return self._loaded_whisper().transcribe(audio, mode=mode, initial_prompt=prompt, condition_on_previous_text=False)
+
+    def _loaded_whisper(self):
+        whisper_model = self.whisper_model
+        if whisper_model is None:
+            raise RuntimeError("Speech model failed to load")
+        return whisper_model
+
+    def _load_whisper(self):
+        # Loads the command and answer models once; whisper_model is the router.
+        return AsrRouter(self._load_asr_model).preload()
+
+    def _load_asr_model(self, model_name):
+        return load_asr_backend(ASR_BACKEND, model_name, WHISPER_ONNX_DIR.format(model=model_name))
+
+    def _load_gemma(self):
+        # The worker process owns the interactive context, the persona prefix
+        # snapshots and the background analysis contexts.
+        gemma_model = InferenceClient(
+            MODEL_PATH,
+            n_ctx=GEMMA_N_CTX,
+            prefixes={persona: self._persona_prefix(persona) for persona in PREFIX_CACHED_PERSONAS},
+            persist_prefix_cache=PERSIST_PREFIX_CACHE,
+            background_contexts=ANALYSIS_POOL_SIZE
+        )
+        gemma_model.start()
+        if RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(MODEL_PATH)
+        return gemma_model
+
+    def _load_piper(self):
+        return PiperVoice.load(PIPER_MODEL_PATH)
+
+    def _synthesize_pcm(self, text):
+        """Speaks `text` into memory with Piper. Returns (int16 samples, sample rate)."""
+        chunks = [chunk.audio_int16_array for chunk in self.piper_voice.synthesize(text)]
+        return np.concatenate(chunks), self.piper_voice.config.sample_rate
+
+    def _get_wake_word_spotter(self):
+        """Builds the wake-word gate once. Returns None if it's disabled or has no templates."""
+        with self.wake_word_lock:
+            if WAKE_WORD_ENABLED and not self.wake_word_built:
+                synthesize = self._synthesize_pcm if self.piper_voice else None
+                self.wake_word_spotter = WakeWordSpotter.from_sources(WAKE_WORD_DIR, synthesize)
+                self.wake_word_built = True
+                if self.wake_word_spotter is None:
+                    print("WAKE_WORD: No templates available; the command listener will run ungated.")
+            return self.wake_word_spotter
+
+    def _wait_for_model(self, name):
+        """Blocks until one model is loaded. Returns None if its load failed."""
+        if not self.model_loader.is_ready(name):
+            self.update_status(f"Loading {self.model_loader.labels[name].lower()}...")
+        try:
+            return self.model_loader.wait(name)
+        except Exception:
+            return None
 
-    def _load_models(self):
-        if not self.whisper_model:
-            self.update_status("Loading speech model...")
-            print("DEBUG: Loading Whisper model...")
-            self.whisper_model = whisper.load_model("base.en")
-            print("DEBUG: Whisper model LOADED.")
-
-        if not self.gemma_model:
-            self.update_status("Loading Gemma AI...")
-            print("DEBUG: Loading Gemma (Llama.cpp) model...")
-            self.gemma_model = Llama(
-                model_path=MODEL_PATH,
-                n_ctx=2048,
-                n_gpu_layers=0,
-                verbose=True
-            )
-            print("DEBUG: Gemma (Llama.cpp) model LOADED.")
-
-        if not self.piper_voice:
-            self.update_status("Loading voice model...")
-            print("DEBUG: Loading Piper model...")
-            self.piper_voice = PiperVoice.load(PIPER_MODEL_PATH)
-            print("DEBUG: Piper model LOADED.")
-
+    def _models_failed(self, *names):
+        """
+        Waits for the models a flow needs. Returns True, after telling the user,
+        if any of them failed to load; callers should then undo their setup and return.
+        """
+        failed = [self.model_loader.labels[name] for name in names if self._wait_for_model(name) is None]
+        if not failed:
+            return False
+        print(f"MODEL_LOADER_ERROR: Cannot continue without: {', '.join(failed)}")
+        self.update_status(f"{' and '.join(failed)} failed to load. Please restart the app.")
+        self.speak(f"Sorry, the {' and the '.join(label.lower() for label in failed)} failed to load, so I can't do that right now.")
+        return True
+
+    @property
+    def whisper_model(self):
+        return self._wait_for_model("whisper")
+
+    @property
+    def gemma_model(self):
+        return self._wait_for_model("gemma")
+
+    @property
+    def piper_voice(self):
+        return self._wait_for_model("piper")
+
+    def _on_model_progress(self, name, label, state):
+        """Called from loader threads whenever a model starts, finishes or fails loading."""
+        self.model_states[name] = (label, state)
+        self.after(0, self._show_model_progress)
+
+    def _show_model_progress(self):
+        if not self.model_states:
+            return
+        text = "\n".join(f"{label}: {state}" for label, state in self.model_states.values())
+        if isinstance(self.current_frame, WelcomeFrame):
+            self.current_frame.load_status_label.configure(text=text)
+        elif isinstance(self.current_frame, MainAppFrame) and not self.model_loader.all_done():
+            self.current_frame.audio_status_label.configure(text=text)
 
     def initialize_models_and_start_onboarding(self):
-        self._load_models()
-        
         self.play_audio("onboarding_start")
         self.play_audio("onboarding_instructions_intro")
         
@@ -448,18 +744,23 @@ class App(ctk.CTk):
         self.play_audio("instructions_part2")
 
         time.sleep(0.5)
-        
+
+        if self._models_failed("whisper", "gemma"):
+            return
         self.onboarding_listener()
 
 
     def initialize_models_and_listen(self):
-        """Loads models and starts the normal command listener."""
-        self._load_models()
-        
+        """Greets the user and starts the normal command listener once the speech model is ready."""
         self.play_audio("nav_main_menu_prompt")
         if self.current_user:
             self.speak(f"Welcome back, {self.current_user['username']}")
 
+        if self._models_failed("whisper"):
+            return
+        if WAKE_WORD_ENABLED and self._get_wake_word_spotter():
+            self.speak(WAKE_WORD_HINT)
+
         self.update_status("Ready for commands.")
         
         self.stop_listening_event = threading.Event()
@@ -539,6 +840,7 @@ class App(ctk.CTk):
         time.sleep(0.5)
 
         self.play_audio("feedback_screen_prompt_guided")
+        self.persistence.flush(PERSISTENCE_FLUSH_TIMEOUT_S)
         self.current_report_list = feedback_manager.get_all_interviews_for_user(self.current_user['id'])
 
         if not self.current_report_list:
@@ -558,23 +860,26 @@ class App(ctk.CTk):
 
         while not stop_event.is_set():
             self.play_audio("feedback_prompt_for_selection")
-            user_choice_text = self.listen_after_prompt() # Re-uses your existing robust listener
+            user_choice_text = self.listen_after_prompt(asr_mode=ASR_MODE_COMMAND) # Re-uses your existing robust listener
 
             if not user_choice_text:
                 self.speak("I'm sorry, I didn't catch that. Please say which report you'd like.")
                 continue
 
             list_len = len(self.current_report_list)
-            prompt = AI_PERSONAS["ORDINAL_SELECTOR"].format(
-                list_length=list_len,
-                list_length_minus_one=list_len - 1,
-                user_text=user_choice_text
-            )
-            full_prompt = f"[INST]{prompt}[/INST]"
-            index_str = self._process_gemma_response(full_prompt, max_tokens=5)
+            report_dates = [datetime.fromisoformat(report['timestamp']) for report in self.current_report_list]
+            selected_index = spoken_parsing.parse_ordinal(user_choice_text, list_len, dates=report_dates)
+            if selected_index == spoken_parsing.UNKNOWN:
+                full_prompt = self._persona_prompt(
+                    "ORDINAL_SELECTOR",
+                    list_length=list_len,
+                    list_length_minus_one=list_len - 1,
+                    user_text=user_choice_text
+                )
+                selected_index = self._process_gemma_response(full_prompt, max_tokens=5)
 
             try:
-                selected_index = int(index_str)
+                selected_index = int(selected_index)
                 if 0 <= selected_index < list_len:
                     selected_report = self.current_report_list[selected_index]
                     interview_id_to_discuss = selected_report['interview_id']
@@ -583,9 +888,13 @@ class App(ctk.CTk):
                     date_str = date_obj.strftime("%B %dth")
                     confirmation_prompt = f"Okay, discussing the {selected_report['interview_type']} interview from {date_str}. Is that correct?"
                     
-                    user_confirmation = self.listen_after_prompt(prompt_text=confirmation_prompt)
+                    user_confirmation = self.listen_after_prompt(prompt_text=confirmation_prompt, asr_mode=ASR_MODE_COMMAND)
+                    decision = spoken_parsing.parse_yes_no(user_confirmation) if user_confirmation else "NO"
+                    if decision == spoken_parsing.UNKNOWN:
+                        confirmation_check = f"[INST]\n{prompts.CONFIRMATION_PROMPT.format(user_response=user_confirmation)}\n[/INST]"
+                        decision = self._process_gemma_response(confirmation_check, max_tokens=5)
                     
-                    if user_confirmation and "yes" in user_confirmation.lower():
+                    if "YES" in decision:
                         stop_event.set()
                         self.after(0, self.start_feedback_session, interview_id_to_discuss)
                         return
@@ -623,19 +932,104 @@ class App(ctk.CTk):
         if isinstance(self.current_frame, MainAppFrame):
             self.after(0, lambda: self.current_frame.transcript_label.configure(text=f'You said: "{text}"'))
 
-    def _process_gemma_response(self, full_prompt, max_tokens=150):
+    def _persona_prefix(self, persona):
+        """Returns the static head of a persona prompt, up to its first placeholder."""
+        return "[INST]\n" + AI_PERSONAS[persona].split("{", 1)[0]
+
+    def _persona_prompt(self, persona, body="", **fields):
+        """Builds a persona prompt that always starts with its cacheable static prefix."""
+        persona_text = AI_PERSONAS[persona].format(**fields) if fields else AI_PERSONAS[persona]
+        return f"[INST]\n{persona_text}\n{body}\n[/INST]"
+
+    def _count_gemma_tokens(self, text):
+        """Counts tokens with Gemma's own tokenizer, or estimates them if the inference worker is unavailable."""
+        try:
+            gemma_model = self.gemma_model
+            if gemma_model is None:
+                raise RuntimeError("Gemma model failed to load")
+            return gemma_model.count_tokens(text)
+        except (RuntimeError, OSError) as e:
+            print(f"Token count failed, estimating from length instead: {e}")
+            return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+    def _process_background_response(self, full_prompt, max_tokens=150):
+        """Same as _process_gemma_response, but queued behind every interactive request."""
+        return self._process_gemma_response(full_prompt, max_tokens=max_tokens, priority=PRIORITY_BACKGROUND)
+
+    def _process_gemma_response(self, full_prompt, max_tokens=150, on_sentence=None, use_cache=True, priority=PRIORITY_INTERACTIVE):
         """
         Takes a fully formatted prompt string and sends it to the LLM.
+        If on_sentence is given, the response is streamed and each completed
+        sentence is passed to it while decoding continues.
+        Pass use_cache=False for prompts whose answer must not be replayed.
         """
-        output = self.gemma_model(full_prompt, max_tokens=max_tokens, stop=["</s>", "[INST]", "User:", "Assistant:"], echo=False)
-        return output['choices'][0]['text'].strip()
+        cache_key = None
+        if self.response_cache and use_cache:
+            cache_key = self.response_cache.make_key(full_prompt, max_tokens, GEMMA_STOP, GEMMA_SAMPLING)
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                print(f"RESPONSE_CACHE: hit {self.response_cache.stats()}")
+                if on_sentence is not None:
+                    segmenter = SentenceSegmenter()
+                    for sentence in segmenter.feed(cached_response) + segmenter.flush():
+                        on_sentence(sentence)
+                return cached_response
+
+        try:
+            response = self._generate_gemma_response(full_prompt, max_tokens, on_sentence, priority)
+        except RuntimeError as e:
+            print(f"Gemma inference error: {e}")
+            return ""
+        if cache_key is not None and response:
+            self.response_cache.put(cache_key, response)
+        return response
+
+    def _generate_gemma_response(self, full_prompt, max_tokens, on_sentence, priority):
+        """Sends the prompt to the inference worker, optionally streaming sentences out."""
+        gemma_model = self.gemma_model
+        if gemma_model is None:
+            raise RuntimeError("Gemma model failed to load")
+        interactive = priority < PRIORITY_BACKGROUND
+        if interactive:
+            with self.interactive_requests_lock:
+                self.interactive_requests += 1
+                self.llm_idle.clear()
+        try:
+            request = gemma_model.submit(
+                full_prompt, max_tokens=max_tokens, stop=GEMMA_STOP, sampling=GEMMA_SAMPLING,
+                priority=priority, stream=on_sentence is not None
+            )
+            if on_sentence is None:
+                return request.result()
+
+            segmenter = SentenceSegmenter()
+            for piece in request:
+                for sentence in segmenter.feed(piece):
+                    on_sentence(sentence)
+            for sentence in segmenter.flush():
+                on_sentence(sentence)
+            return request.text
+        finally:
+            if interactive:
+                with self.interactive_requests_lock:
+                    self.interactive_requests -= 1
+                    if self.interactive_requests == 0:
+                        self.llm_idle.set()
     
     def populate_interview_list(self):
-        for widget in self.current_frame.interview_list_frame.winfo_children():
+        frame = self.current_frame
+        for widget in frame.interview_list_frame.winfo_children():
             widget.destroy()
 
-        interviews = feedback_manager.get_all_interviews_for_user(self.current_user['id'])
+        user_id = self.current_user['id']
+        self._read_after_flush(
+            lambda: feedback_manager.get_all_interviews_for_user(user_id),
+            lambda interviews: self._show_interview_list(frame, interviews)
+        )
 
+    def _show_interview_list(self, frame, interviews):
+        if frame is not self.current_frame:
+            return
         for interview in interviews:
             date_str = interview['timestamp'].split(" ")[0]
             button_text = f"{interview['interview_type']}\n{date_str}"
@@ -648,8 +1042,15 @@ class App(ctk.CTk):
             button.pack(fill="x", padx=5, pady=5)
 
     def display_feedback_report(self, interview_id: str):
-        report_details = feedback_manager.get_report_details_by_interview_id(interview_id)
+        frame = self.current_frame
+        self._read_after_flush(
+            lambda: feedback_manager.get_report_details_by_interview_id(interview_id),
+            lambda report_details: self._show_feedback_report(frame, report_details)
+        )
 
+    def _show_feedback_report(self, frame, report_details):
+        if frame is not self.current_frame:
+            return
         if not report_details:
             formatted_text = "Error: Could not retrieve report details."
         else:
@@ -689,7 +1090,15 @@ class App(ctk.CTk):
             print("Cannot start feedback session while another process is active.")
             return
 
-        report_details = feedback_manager.get_report_details_by_interview_id(interview_id)
+        self._read_after_flush(
+            lambda: feedback_manager.get_report_details_by_interview_id(interview_id),
+            self._begin_feedback_session
+        )
+
+    def _begin_feedback_session(self, report_details):
+        if self.interview_in_progress:
+            print("Cannot start feedback session while another process is active.")
+            return
         if not report_details:
             self.speak("I'm sorry, I couldn't retrieve the details for that report.")
             self.after(0, self.exit_feedback_mode_if_active)
@@ -714,22 +1123,24 @@ class App(ctk.CTk):
         MODIFIED: This version has a simplified and corrected prompt structure
         to prevent AI confusion and restore correct conversational behavior.
         """
+        if self._models_failed("whisper", "gemma"):
+            self.app_state = "NAVIGATION"
+            self.interview_in_progress = False
+            self.exit_feedback_mode_if_active()
+            return
         self.after(0, lambda: self.current_frame.discuss_button.configure(state="disabled"))
         self.after(0, lambda: self.current_frame.return_button.configure(state="disabled"))
         self.update_status("Starting Feedback...")
 
         feedback_history = []
         
-        initial_prompt = f"""
-        [INST]
-        {AI_PERSONAS['FEEDBACK_COACH']}
+        initial_prompt = self._persona_prompt("FEEDBACK_COACH", f"""
         Here is the full interview report to discuss:
         ---
         {report_text}
         ---
         Now, provide your initial summary of what went well and what can be improved.
-        [/INST]
-        """
+        """)
         ai_response = self._process_gemma_response(initial_prompt, max_tokens=300)
         feedback_history.append({"role": "assistant", "content": ai_response})
         
@@ -740,9 +1151,10 @@ class App(ctk.CTk):
                 self.speak("I'm sorry, I didn't catch that. Could you ask your question again?")
                 continue
 
-            exit_check_prompt = f"""[INST]{AI_PERSONAS['EXIT_DETECTOR']}
-            User says: "{user_question}"[/INST]"""
-            exit_decision = self._process_gemma_response(exit_check_prompt, max_tokens=10)
+            exit_decision = spoken_parsing.detect_exit(user_question)
+            if exit_decision == spoken_parsing.UNKNOWN:
+                exit_check_prompt = self._persona_prompt("EXIT_DETECTOR", f'User says: "{user_question}"')
+                exit_decision = self._process_gemma_response(exit_check_prompt, max_tokens=10)
 
             if "YES_EXIT" in exit_decision:
                 print("DEBUG: Exit intent detected.")
@@ -765,7 +1177,7 @@ class App(ctk.CTk):
             Based on the user's last question, provide a helpful and encouraging answer.
             [/INST]
             """
-            self.play_audio("interview_ai_thinking")
+            self.play_audio("interview_ai_thinking", blocking=False)
             ai_response = self._process_gemma_response(qa_prompt, max_tokens=300)
             feedback_history.append({"role": "assistant", "content": ai_response})
 
@@ -778,9 +1190,6 @@ class App(ctk.CTk):
 
     def onboarding_listener(self):
         """Manages the conversational onboarding flow with a fixed number of turns."""
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
-        
         turn_counter = 0
         
         user_input = "" 
@@ -788,7 +1197,7 @@ class App(ctk.CTk):
         while self.app_state == "ONBOARDING":
             if user_input and user_input != "...":
                 self.conversation_history.append({"role": "user", "content": user_input})
-                db.add_message_to_history(self.current_user['id'], "user", user_input)
+                self.persistence.add_message(self.current_user['id'], "user", user_input)
                 
                 turn_counter += 1
 
@@ -797,7 +1206,7 @@ class App(ctk.CTk):
                 self.execute_command("[END_ONBOARDING]")
                 break
 
-            prompt_for_gemma = f"[INST] {AI_PERSONAS[self.current_persona]} [/INST]"
+            prompt_for_gemma = self._persona_prompt(self.current_persona)
             if not self.conversation_history:
                  prompt_for_gemma += " Assistant:"
             else:
@@ -808,79 +1217,94 @@ class App(ctk.CTk):
                         prompt_for_gemma += f"\n[INST] {msg['content']} [/INST]"
 
             self.update_status("Gemma is thinking...")
-            ai_response = self._process_gemma_response(prompt_for_gemma)
+            # Onboarding small talk should feel fresh for every new student.
+            ai_response = self._process_gemma_response(prompt_for_gemma, use_cache=False)
 
             if "[END_ONBOARDING]" in ai_response:
                 self.execute_command("[END_ONBOARDING]")
                 break
 
             self.conversation_history.append({"role": "assistant", "content": ai_response})
-            db.add_message_to_history(self.current_user['id'], "assistant", ai_response)
+            self.persistence.add_message(self.current_user['id'], "assistant", ai_response)
             
             user_input = self.listen_after_prompt(prompt_text=self._sanitize_for_speech(ai_response))
             
             if not user_input:
                 self.conversation_history.pop()
-                db.remove_last_message(self.current_user['id'])
+                self.persistence.remove_last_message(self.current_user['id'])
                 user_input = "..."
     
     def background_listener(self, stop_event):
         """
         Listens for navigation commands in a dedicated, stoppable thread.
-        This version includes a beep to prompt the user to speak.
+        With the wake-word gate, only utterances that open with "Pragati" are
+        transcribed; otherwise it beeps to prompt the user to speak.
         """
 
         print("DEBUG: Background listener thread started.")
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+        spotter = self._get_wake_word_spotter()
+        cpu_meter = ListenerCpuMeter()
 
         while not stop_event.is_set():
             try:
-                self.update_status("Ready for command...")
-                self.play_audio("beep")
+                cpu_meter.enter("idle")
+                cpu_meter.maybe_report(spotter)
+                if spotter:
+                    self.update_status('Say "Pragati" followed by a command...')
+                else:
+                    self.update_status("Ready for command...")
+                    self.play_audio("beep")
 
-                with self.microphone as source:
-                    audio_data = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
+                with self.capture.subscribe(COMMAND_POLICY) as subscription:
+                    audio = subscription.next_utterance()
 
                 if stop_event.is_set():
                     break
+                if audio is None:
+                    continue
+                if spotter:
+                    wake = spotter.detect(audio)
+                    if not wake.detected:
+                        continue
+                    print(f"WAKE_WORD: Detected (score {wake.score:.2f}).")
 
+                cpu_meter.enter("active")
                 self.update_status("Transcribing command...")
-                wav_data = audio_data.get_wav_data()
-                temp_audio_path = Path("temp_audio.wav")
-                with open(temp_audio_path, "wb") as f:
-                    f.write(wav_data)
-
-                result = self.whisper_model.transcribe(str(temp_audio_path), fp16=False)
-                user_text = result['text'].strip()
-                os.remove(temp_audio_path)
+                user_text = self._transcribe(audio, ASR_MODE_COMMAND)
+
+                if spotter:
+                    user_text = strip_wake_phrase(user_text)
+                    if not user_text:
+                        # Only the wake word was said; ask for the command itself.
+                        self.update_status("Ready for command...")
+                        self.play_audio("beep")
+                        with self.capture.subscribe(COMMAND_POLICY) as subscription:
+                            audio = subscription.next_utterance()
+                        if audio is None or stop_event.is_set():
+                            continue
+                        user_text = self._transcribe(audio, ASR_MODE_COMMAND)
 
                 if user_text:
                     self.update_transcript(user_text)
                     self.update_status(f"Heard: '{user_text}'\n\nThinking...")
 
-                    prompt = f"""[INST]
-                    {AI_PERSONAS['NAVIGATION_ASSISTANT']}
-
-                    User Request: "{user_text}"
-
-                    Command:
-                    [/INST]"""
-
-                    command = self._process_gemma_response(prompt, max_tokens=30)
-                    print(f"DEBUG: Cleaned command from Gemma: '{command}'")
+                    # Common commands are resolved locally; Gemma is only asked when the router is unsure.
+                    route_start = time.perf_counter()
+                    match = intent_router.route(user_text)
+                    if match.confidence >= intent_router.CONFIDENCE_THRESHOLD:
+                        command, path = match.command, "router"
+                    else:
+                        prompt = self._persona_prompt("NAVIGATION_ASSISTANT", f'User Request: "{user_text}"\n\nCommand:')
+                        command, path = self._process_gemma_response(prompt, max_tokens=30), "llm"
+                        print(f"DEBUG: Cleaned command from Gemma: '{command}'")
+                    intent_router.log_resolution(user_text, command, match, path, (time.perf_counter() - route_start) * 1000)
                     self.after(0, self.execute_command, command)
                 
-            except sr.WaitTimeoutError:
-                continue
-            except sr.UnknownValueError:
-                self.update_status("Could not understand audio.")
-                continue
             except Exception as e:
                 print(f"An error occurred in background_listener: {e}")
-                import time
                 time.sleep(1)
 
+        cpu_meter.maybe_report(spotter, force=True)
         print("DEBUG: Background listener thread has successfully stopped.")
 
     def start_interview_session(self, interview_type):
@@ -899,9 +1323,11 @@ class App(ctk.CTk):
 
     def _interview_thread(self, interview_type):
         """Manages the entire interview flow, from start to analysis."""
-        
-        self.recognizer.pause_threshold = 2.5
-        print(f"DEBUG: Mic pause_threshold set to {self.recognizer.pause_threshold} for interview.")
+        if self._models_failed("whisper", "gemma"):
+            self.interview_in_progress = False
+            self.stop_listening_event = threading.Event()
+            threading.Thread(target=self.background_listener, args=(self.stop_listening_event,), daemon=True).start()
+            return
 
         self.after(0, lambda: self.current_frame.background_button.configure(state="disabled"))
         self.after(0, lambda: self.current_frame.salary_button.configure(state="disabled"))
@@ -913,20 +1339,36 @@ class App(ctk.CTk):
         prompt_template = prompts.BACKGROUND_INTERVIEW_PROMPT if interview_type == "Background" else prompts.SALARY_NEGOTIATION_PROMPT
         
         turn_count = 0
+        # Answers are scored in the background while the interview continues.
+        scorer = interview_analyzer.IncrementalAnalyzer(
+            self.gemma_model, self._process_background_response, interview_type, idle_event=self.llm_idle,
+            workers=self.gemma_model.background_contexts
+        )
+        history_window = InterviewHistoryWindow(
+            self._count_gemma_tokens, self._process_background_response,
+            n_ctx=GEMMA_N_CTX, max_tokens=INTERVIEW_RESPONSE_TOKENS, keep_turns=INTERVIEW_VERBATIM_TURNS
+        )
         
         while True:
             turn_count += 1
             print(f"\n--- Turn {turn_count} ---")
 
-            self.play_audio("interview_ai_thinking")
+            self.play_audio("interview_ai_thinking", blocking=False)
 
-            ai_response = gemma_logic.get_interview_response(self.gemma_model, self._process_gemma_response, interview_history, prompt_template)
+            # The response is spoken sentence by sentence while it is still being
+            # generated, with the microphone already open for the answer.
+            barge_in = self._open_barge_in(INTERVIEW_POLICY)
+            ai_response = gemma_logic.get_interview_response(
+                self.gemma_model, self._stream_gemma_to_speech, interview_history, prompt_template,
+                history_window=history_window
+            )
             
             if ai_response.startswith("```"):
                 ai_response = ai_response.strip("` \n")
 
             if not ai_response:
                 print("WARNING: Model returned empty response. Attempting to conclude.")
+                self._close_barge_in(barge_in)
                 self.speak("It seems we've reached a good stopping point. Thank you for your time.")
                 break
 
@@ -936,11 +1378,11 @@ class App(ctk.CTk):
             
             conclusion_phrases = ["thank you for your time", "we'll be in touch", "end the simulation", "conclude our discussion"]
             if any(phrase in ai_response.lower() for phrase in conclusion_phrases):
-                self.speak(self._sanitize_for_speech(ai_response))
                 print("INFO: Interview concluded by AI's closing statement.")
+                self._close_barge_in(barge_in)
                 break
 
-            user_answer = self.listen_after_prompt(prompt_text=self._sanitize_for_speech(ai_response))
+            user_answer = self.listen_after_prompt(policy=INTERVIEW_POLICY, subscription=barge_in)
             print(f"USER: {user_answer if user_answer else '<No input detected>'}")
 
             if not user_answer:
@@ -951,6 +1393,9 @@ class App(ctk.CTk):
             
             self.after(0, self._add_message_to_chat_ui, "user", user_answer)
             interview_history.append({"role": "user", "content": user_answer})
+            answered_count = sum(1 for msg in interview_history if msg['role'] == 'user')
+            scorer.submit(answered_count, ai_response, user_answer)
+            history_window.observe(interview_history)
             
             should_end, reason = interview_flow_manager.should_end_interview(interview_history, interview_type, turn_count)
             if should_end:
@@ -966,18 +1411,13 @@ class App(ctk.CTk):
         self.update_status("Interview finished. Analyzing...")
         self.play_audio("interview_analysis_starting")
         
-        analysis_results = interview_analyzer.run_full_analysis(
-            self.gemma_model, self._process_gemma_response, interview_history, interview_type
-        )
+        analysis_results = scorer.finish()
         if analysis_results:
-            feedback_manager.save_feedback_to_db(self.current_user['id'], analysis_results)
+            self.persistence.save_feedback(self.current_user['id'], analysis_results)
             self.play_audio("interview_analysis_complete")
         else:
             self.speak("There was an issue generating the analysis, so no report was saved.")
 
-        self.recognizer.pause_threshold = 1.0 
-        print(f"DEBUG: Mic pause_threshold restored to {self.recognizer.pause_threshold} for commands.")
-
         self.after(0, lambda: self.current_frame.background_button.configure(state="normal"))
         self.after(0, lambda: self.current_frame.salary_button.configure(state="normal"))
         
@@ -1028,9 +1468,10 @@ class App(ctk.CTk):
         """Fetches history, gets summary from LLM, and updates the database."""
         self.play_audio("onboarding_concluding")
         
+        self.persistence.flush(PERSISTENCE_FLUSH_TIMEOUT_S)
         final_history = db.get_conversation_history(self.current_user['id'])
         history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in final_history])
-        summarizer_prompt = f"[INST]\n{AI_PERSONAS['SUMMARIZER']}\n\nCONVERSATION HISTORY:\n{history_text}\n[/INST]"
+        summarizer_prompt = self._persona_prompt("SUMMARIZER", f"CONVERSATION HISTORY:\n{history_text}")
         
         self.update_status("Creating profile summary...")
         json_summary_str = self._process_gemma_response(summarizer_prompt)
@@ -1062,6 +1503,8 @@ class App(ctk.CTk):
 
 
 if __name__ == "__main__":
+    # Needed for the inference worker process in PyInstaller builds.
+    multiprocessing.freeze_support()
     print("Application starting up...")
     db.initialize_database()
     app = App()
@@ -0,0 +1,74 @@
+# asr_audio.py
+
+import wave
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(raw_pcm):
+    """Converts 16-bit little-endian mono PCM bytes into a float32 array in [-1, 1]."""
+    return np.frombuffer(raw_pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+# Zero crossings of the sinc kernel on each side of an output sample.
+RESAMPLE_ZERO_CROSSINGS = 8
+# Input samples per process() call when resampling a whole clip, to bound memory.
+RESAMPLE_CHUNK = 16000
+
+
+class Resampler:
+    """
+    Hann-windowed sinc resampler for a stream of float32 blocks, at any pair of
+    rates. The cutoff sits at the lower of the two Nyquist frequencies, so
+    downsampling a 44.1 or 48 kHz microphone doesn't alias into the speech band.
+    The tail of each block is kept, so consecutive blocks join seamlessly.
+    """
+
+    def __init__(self, from_rate, to_rate=WHISPER_SAMPLE_RATE, zero_crossings=RESAMPLE_ZERO_CROSSINGS):
+        self.step = from_rate / to_rate  # input samples per output sample
+        self.cutoff = min(1.0, to_rate / from_rate)  # as a fraction of the input Nyquist
+        self.half = int(np.ceil(zero_crossings / self.cutoff))  # kernel half-width in input samples
+        self.offsets = np.arange(-self.half + 1, self.half + 1)
+        self.buffer = np.zeros(self.half, dtype=np.float32)
+        self.time = float(self.half)  # next output position, in buffer samples
+
+    def process(self, block):
+        buffer = np.concatenate((self.buffer, np.asarray(block, dtype=np.float32)))
+        last = len(buffer) - self.half - 1  # latest position with the full kernel inside the buffer
+        count = int((last - self.time) // self.step) + 1 if last >= self.time else 0
+        times = self.time + np.arange(count) * self.step
+        taps = np.floor(times).astype(np.int64)[:, None] + self.offsets
+        distance = times[:, None] - taps
+        kernel = self.cutoff * np.sinc(self.cutoff * distance) * (0.5 + 0.5 * np.cos(np.pi * distance / self.half))
+        out = np.sum(buffer[taps] * kernel, axis=1).astype(np.float32)
+
+        self.time += count * self.step
+        keep_from = max(0, int(self.time) - self.half + 1)
+        self.buffer = buffer[keep_from:]
+        self.time -= keep_from
+        return out
+
+
+def resample(audio, from_rate, to_rate=WHISPER_SAMPLE_RATE):
+    """Band-limited resampling of a whole float32 array (see Resampler)."""
+    if from_rate == to_rate:
+        return audio
+    resampler = Resampler(from_rate, to_rate)
+    padded = np.concatenate((np.asarray(audio, dtype=np.float32), np.zeros(resampler.half + 1, dtype=np.float32)))
+    out = np.concatenate([resampler.process(padded[i:i + RESAMPLE_CHUNK]) for i in range(0, len(padded), RESAMPLE_CHUNK)])
+    return out[:int(len(audio) * to_rate / from_rate)]
+
+
+def load_wav(path):
+    """Reads a 16-bit WAV file into a 16 kHz mono float32 array."""
+    with wave.open(path, "rb") as wav:
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        if wav.getsampwidth() != 2:
+            raise ValueError("only 16-bit WAV files are supported")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return resample(samples.astype(np.float32) / 32768.0, rate)
@@ -0,0 +1,162 @@
+# asr_backends.py
+
+import base64
+import json
+import os
+
+import numpy as np
+
+from asr_audio import WHISPER_SAMPLE_RATE
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+
+# Files written by export_whisper_onnx.py.
+ONNX_ENCODER_FILE = "encoder.int8.onnx"
+ONNX_DECODER_FILE = "decoder.int8.onnx"
+ONNX_CONFIG_FILE = "config.json"
+ONNX_VOCAB_FILE = "vocab.tiktoken"
+ONNX_MEL_FILTERS_FILE = "mel_filters.npy"
+
+N_FFT = 400
+HOP_LENGTH = 160
+CHUNK_SECONDS = 30
+N_SAMPLES = CHUNK_SECONDS * WHISPER_SAMPLE_RATE
+
+
+class TorchWhisperBackend:
+    """The reference openai-whisper model on PyTorch."""
+
+    name = BACKEND_TORCH
+
+    def __init__(self, model_name="base.en"):
+        import whisper
+        self.model_name = model_name
+        self.model = whisper.load_model(model_name)
+
+    def transcribe(self, audio, initial_prompt=None, **options):
+        """Transcribes 16 kHz float32 audio. Extra options go straight to whisper's transcribe()."""
+        result = self.model.transcribe(audio, fp16=False, initial_prompt=initial_prompt or None, **options)
+        return result['text'].strip()
+
+
+def log_mel_spectrogram(audio, filters):
+    """NumPy port of whisper.audio.log_mel_spectrogram for one padded 30 s chunk."""
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)  # periodic Hann, as torch.hann_window
+    padded = np.pad(audio, N_FFT // 2, mode="reflect")
+    count = 1 + (len(padded) - N_FFT) // HOP_LENGTH
+    index = np.arange(N_FFT)[None, :] + HOP_LENGTH * np.arange(count)[:, None]
+    magnitudes = np.abs(np.fft.rfft(padded[index] * window, axis=1)) ** 2
+    mel = filters @ magnitudes[:-1].T
+    log_spec = np.log10(np.maximum(mel, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+class OnnxWhisperBackend:
+    """
+    Whisper's encoder and decoder exported to ONNX with int8 weights and run on
+    ONNX Runtime, so transcription never imports torch. The encoder also returns
+    the decoder's cross-attention keys and values, and the decoder carries its
+    self-attention cache between steps, so each greedy step costs one token.
+    Decoding is without timestamps; audio longer than 30 s is handled a window
+    at a time, each window prompted with the text before it.
+    """
+
+    name = BACKEND_ONNX
+
+    def __init__(self, model_dir, threads=None):
+        import onnxruntime as ort
+        import tiktoken
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE), encoding="utf-8") as f:
+            self.config = json.load(f)
+        with open(os.path.join(model_dir, ONNX_VOCAB_FILE), encoding="utf-8") as f:
+            ranks = {base64.b64decode(token): int(rank) for token, rank in (line.split() for line in f if line.strip())}
+        self.encoding = tiktoken.Encoding(
+            name="whisper-" + self.config["model_name"],
+            pat_str=self.config["pat_str"],
+            mergeable_ranks=ranks,
+            special_tokens=self.config["special_tokens"],
+        )
+        self.filters = np.load(os.path.join(model_dir, ONNX_MEL_FILTERS_FILE))
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        providers = ["CPUExecutionProvider"]
+        self.encoder = ort.InferenceSession(os.path.join(model_dir, ONNX_ENCODER_FILE), options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(model_dir, ONNX_DECODER_FILE), options, providers=providers)
+        self.model_dir = model_dir
+
+    def _decode_window(self, audio, prompt_tokens):
+        cfg = self.config
+        chunk = np.zeros(N_SAMPLES, dtype=np.float32)
+        chunk[:len(audio)] = audio[:N_SAMPLES]
+        mel = log_mel_spectrogram(chunk, self.filters)[None]
+        cross_k, cross_v = self.encoder.run(None, {"mel": mel})
+
+        max_prompt = cfg["n_text_ctx"] // 2 - 1
+        tokens = ([cfg["sot_prev"]] + prompt_tokens[-max_prompt:] if prompt_tokens else []) + cfg["sot_sequence"]
+        sample_begin = len(tokens)
+        # The first step runs the prompt; after that only the newest token is fed,
+        # with the keys and values of everything before it carried over.
+        past_k = past_v = np.zeros((cfg["n_text_layer"], 1, 0, cfg["n_text_state"]), dtype=np.float32)
+        step_tokens = tokens
+        generated = []
+        while len(generated) < cfg["n_text_ctx"] // 2 and len(tokens) < cfg["n_text_ctx"]:
+            logits, past_k, past_v = self.decoder.run(None, {
+                "tokens": np.array([step_tokens], dtype=np.int64),
+                "cross_k": cross_k,
+                "cross_v": cross_v,
+                "past_k": past_k,
+                "past_v": past_v,
+            })
+            logits = logits[0, -1]
+            logits[cfg["suppress_tokens"]] = -np.inf
+            logits[cfg["timestamp_begin"]:] = -np.inf
+            if len(tokens) == sample_begin:
+                logits[cfg["blank_tokens"]] = -np.inf
+            next_token = int(np.argmax(logits))
+            if next_token == cfg["eot"]:
+                break
+            tokens.append(next_token)
+            generated.append(next_token)
+            step_tokens = [next_token]
+        return generated
+
+    def transcribe(self, audio, initial_prompt=None, **options):
+        """Transcribes 16 kHz float32 audio. Beam search and temperature options are ignored."""
+        prompt_tokens = self.encoding.encode(" " + initial_prompt.strip()) if initial_prompt else []
+        pieces = []
+        for start in range(0, max(len(audio), 1), N_SAMPLES):
+            generated = self._decode_window(audio[start:start + N_SAMPLES], prompt_tokens)
+            pieces.append(self.encoding.decode(generated).strip())
+            prompt_tokens = prompt_tokens + generated
+        return " ".join(p for p in pieces if p)
+
+
+def _has_kv_cache_export(onnx_dir):
+    """Exports from before the decoder took its KV cache as inputs have to be redone."""
+    path = onnx_dir and os.path.join(onnx_dir, ONNX_CONFIG_FILE)
+    if not path or not os.path.isfile(path):
+        return False
+    try:
+        with open(path, encoding="utf-8") as f:
+            return bool(json.load(f).get("decoder_kv_cache"))
+    except (OSError, ValueError):
+        return False
+
+
+def load_asr_backend(kind, model_name="base.en", onnx_dir=None):
+    """
+    Loads the ASR backend chosen in config. Falls back to PyTorch when the
+    ONNX export is missing, so a fresh checkout still has working speech input.
+    """
+    if kind == BACKEND_ONNX:
+        if _has_kv_cache_export(onnx_dir):
+            return OnnxWhisperBackend(onnx_dir)
+        print(f"ASR_BACKEND: No up-to-date ONNX export in {onnx_dir}; run export_whisper_onnx.py. Using PyTorch instead.")
+    elif kind != BACKEND_TORCH:
+        raise ValueError(f"Unknown ASR backend '{kind}'")
+    return TorchWhisperBackend(model_name)
@@ -0,0 +1,70 @@
+# asr_router.py
+
+import threading
+from collections import namedtuple
+
+ASR_MODE_COMMAND = "command"
+ASR_MODE_ANSWER = "answer"
+
+# Biases short, context-free command clips toward the words the app actually listens for.
+COMMAND_VOCABULARY_PROMPT = (
+    "Pragati. Go to the interview screen. Open feedback. Help. Explain the instructions. "
+    "Start background interview. Start salary negotiation. The first one, the second one, "
+    "the third one, the last one, the latest report. Yes. No. Exit. Go back."
+)
+
+AsrProfile = namedtuple("AsrProfile", ["model", "options", "initial_prompt"])
+
+ASR_PROFILES = {
+    # Greedy decoding at temperature 0 only: no beam search and no temperature
+    # fallback retries, which on a 2-second clip would cost more than the decode.
+    ASR_MODE_COMMAND: AsrProfile(
+        model="tiny.en",
+        options={"temperature": 0.0, "condition_on_previous_text": False, "without_timestamps": True},
+        initial_prompt=COMMAND_VOCABULARY_PROMPT,
+    ),
+    # Answers are scored and quoted back in reports, so they get beam search
+    # with whisper's usual temperature fallback.
+    ASR_MODE_ANSWER: AsrProfile(
+        model="base.en",
+        options={"beam_size": 5, "best_of": 5},
+        initial_prompt=None,
+    ),
+}
+
+
+class AsrRouter:
+    """
+    Chooses the Whisper model and decoding options for each call site. Every
+    distinct model is loaded once through `load_backend(model_name)` and shared
+    by all the modes that use it.
+    """
+
+    def __init__(self, load_backend, profiles=None):
+        self.load_backend = load_backend
+        self.profiles = profiles or ASR_PROFILES
+        self.backends = {}
+        self.lock = threading.Lock()
+
+    def backend_for(self, mode):
+        model = self.profiles[mode].model
+        with self.lock:
+            if model not in self.backends:
+                print(f"DEBUG: Loading Whisper '{model}' for {mode} transcription...")
+                self.backends[model] = self.load_backend(model)
+            return self.backends[model]
+
+    def preload(self):
+        """Loads every model the profiles use, answer model first."""
+        for mode in sorted(self.profiles, key=lambda m: m != ASR_MODE_ANSWER):
+            self.backend_for(mode)
+        return self
+
+    def transcribe(self, audio, mode=ASR_MODE_ANSWER, initial_prompt=None, **options):
+        """Transcribes with the mode's model and options; explicit arguments override the profile."""
+        profile = self.profiles[mode]
+        decode_options = dict(profile.options)
+        decode_options.update(options)
+        return self.backend_for(mode).transcribe(
+            audio, initial_prompt=initial_prompt or profile.initial_prompt, **decode_options
+        )
@@ -0,0 +1,92 @@
+# audio_cues.py
+
+import json
+import os
+import wave
+
+import numpy as np
+
+CUE_SAMPLE_RATE = 22050
+
+
+def decode_wav(path, sample_rate=CUE_SAMPLE_RATE):
+    """Decodes a 16-bit WAV into mono int16 at `sample_rate` (linear resampling if needed)."""
+    with wave.open(path, "rb") as wav:
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path} is not 16-bit PCM")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    if rate != sample_rate:
+        target = np.arange(int(len(samples) * sample_rate / rate)) * (rate / sample_rate)
+        samples = np.interp(target, np.arange(len(samples)), samples).astype(np.int16)
+    return samples
+
+
+class CueBank:
+    """
+    Every UI sound, decoded once into int16 buffers. With `pack_path`, the cues
+    are stored back to back in one .npy file that is memory-mapped on later
+    starts, so nothing is decoded or resampled again until a source WAV changes.
+    """
+
+    def __init__(self, paths, sample_rate=CUE_SAMPLE_RATE, pack_path=None):
+        self.sample_rate = sample_rate
+        self.cues = {}
+        self.missing = set()
+        if pack_path and self._load_pack(paths, pack_path):
+            return
+        for name, path in paths.items():
+            try:
+                self.cues[name] = decode_wav(path, sample_rate)
+            except FileNotFoundError:
+                print(f"AUDIO_PLAYER_ERROR: File not found at path: {path}")
+                self.missing.add(name)
+            except (OSError, ValueError, wave.Error) as e:
+                print(f"AUDIO_PLAYER_ERROR: Could not decode '{name}': {e}")
+                self.missing.add(name)
+        if pack_path and not self.missing:
+            self._write_pack(paths, pack_path)
+
+    @staticmethod
+    def _sources(paths):
+        sources = {}
+        for name, path in paths.items():
+            stat = os.stat(path)
+            sources[name] = [path, stat.st_size, stat.st_mtime]
+        return sources
+
+    def _load_pack(self, paths, pack_path):
+        index_path = pack_path + ".json"
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index["sample_rate"] != self.sample_rate or index["sources"] != self._sources(paths):
+                return False
+            packed = np.load(pack_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return False
+        for name, (offset, length) in index["offsets"].items():
+            self.cues[name] = packed[offset:offset + length]
+        print(f"AUDIO_PLAYER: Loaded {len(self.cues)} cues from {pack_path}.")
+        return True
+
+    def _write_pack(self, paths, pack_path):
+        offsets, position = {}, 0
+        for name, samples in self.cues.items():
+            offsets[name] = [position, len(samples)]
+            position += len(samples)
+        try:
+            np.save(pack_path, np.concatenate(list(self.cues.values())))
+            with open(pack_path + ".json", "w", encoding="utf-8") as f:
+                json.dump({"sample_rate": self.sample_rate, "sources": self._sources(paths), "offsets": offsets}, f)
+        except OSError as e:
+            print(f"AUDIO_PLAYER_ERROR: Could not write cue pack: {e}")
+
+    def get(self, name):
+        """Returns the cue's samples. Raises KeyError for unknown names, FileNotFoundError for missing files."""
+        if name in self.missing:
+            raise FileNotFoundError(name)
+        return self.cues[name]
@@ -0,0 +1,174 @@
+# audio_output.py
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import sounddevice as sd
+
+CHANNEL_SPEECH = "speech"
+CHANNEL_CUES = "cues"
+# How many output blocks of level history are kept for echo suppression (~6 s at 512 samples).
+PLAYED_HISTORY_BLOCKS = 256
+# A device that failed to open or has stopped is reopened by the next play(), at most this often.
+REOPEN_INTERVAL_S = 2.0
+
+
+class _Playback:
+    __slots__ = ("samples", "position", "future")
+
+    def __init__(self, samples, future):
+        self.samples = samples
+        self.position = 0
+        self.future = future
+
+
+class AudioMixer:
+    """
+    Owns the output device for the life of the app, at Piper's sample rate.
+    Speech and cues each have their own FIFO of int16 buffers; the stream
+    callback plays each channel's buffers in order and sums the two channels,
+    so a cue can sound over speech. Buffers are referenced, never copied, and
+    every play() returns a Future that completes when its buffer has been
+    played (or is cancelled by stop()).
+
+    The level of every block sent to the speaker is also logged with the time
+    it reaches the speaker, so the microphone side can tell the app's own
+    voice from the student's.
+
+    If the device can't be opened, or its stream stops, play() reopens it;
+    anything queued on a stream that stopped is resolved to False.
+    """
+
+    def __init__(self, sample_rate, blocksize=512):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.channels = {CHANNEL_SPEECH: deque(), CHANNEL_CUES: deque()}
+        self.lock = threading.Lock()
+        self.mix = np.zeros(blocksize * 4, dtype=np.int32)
+        self.played = deque(maxlen=PLAYED_HISTORY_BLOCKS)  # (monotonic time at the speaker, dBFS)
+        self.stream = None
+        self.output_latency = 0.0
+        self.last_failed_open = None
+        self.open_lock = threading.Lock()
+
+    def start(self):
+        stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=self.blocksize,
+            latency='low',
+            callback=self._callback,
+            finished_callback=self._on_finished
+        )
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        self.stream = stream
+        self.output_latency = self.stream.latency
+        print(f"AUDIO_PLAYER: Output mixer running at {self.sample_rate} Hz.")
+
+    @property
+    def running(self):
+        return self.stream is not None and self.stream.active
+
+    def _ensure_running(self):
+        with self.open_lock:
+            if self.running:
+                return
+            if self.last_failed_open is not None and time.monotonic() - self.last_failed_open < REOPEN_INTERVAL_S:
+                return
+            if self.stream is not None:
+                print("AUDIO_PLAYER: Output stream stopped; reopening it.")
+                self.close()
+            try:
+                self.start()
+            except Exception as e:
+                self.last_failed_open = time.monotonic()
+                print(f"AUDIO_PLAYER_ERROR: Could not open the output device: {e}")
+
+    def _on_finished(self):
+        # The stream stopped (closed, or the device went away): nothing queued will play.
+        for channel in self.channels:
+            self.stop(channel)
+
+    def _callback(self, outdata, frames, time_info, status):
+        if len(self.mix) < frames:
+            self.mix = np.zeros(frames, dtype=np.int32)
+        mix = self.mix[:frames]
+        mix[:] = 0
+        finished = []
+        audible = False
+        with self.lock:
+            for pending in self.channels.values():
+                audible = audible or bool(pending)
+                filled = 0
+                while filled < frames and pending:
+                    item = pending[0]
+                    count = min(frames - filled, len(item.samples) - item.position)
+                    mix[filled:filled + count] += item.samples[item.position:item.position + count]
+                    filled += count
+                    item.position += count
+                    if item.position >= len(item.samples):
+                        finished.append(pending.popleft().future)
+        np.clip(mix, -32768, 32767, out=mix)
+        outdata[:, 0] = mix
+        if audible:
+            x = mix.astype(np.float32) / 32768.0
+            level = 10.0 * np.log10(float(np.dot(x, x)) / frames + 1e-10)
+            self.played.append((time.monotonic() + self.output_latency, level))
+        for future in finished:
+            future.set_result(True)
+
+    def played_level_db(self, times, tail_s):
+        """
+        For each monotonic time in `times`, the level of the loudest block that
+        reached the speaker within the preceding `tail_s` seconds, or -inf where
+        nothing was playing. Returns None before anything has been played.
+        """
+        history = tuple(self.played)
+        if not history:
+            return None
+        played_at, level = np.array(history).T
+        times = np.asarray(times)[:, None]
+        window = (played_at <= times) & (played_at > times - tail_s)
+        return np.where(window, level, -np.inf).max(axis=1)
+
+    def play(self, samples, channel=CHANNEL_CUES):
+        """
+        Queues int16 mono samples at the mixer's rate. Returns a Future for the end
+        of playback. Raises RuntimeError if there is no working output device.
+        """
+        self._ensure_running()
+        if not self.running:
+            raise RuntimeError("no output device")
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self.lock:
+            self.channels[channel].append(_Playback(samples, future))
+        return future
+
+    def stop(self, channel=CHANNEL_SPEECH):
+        """Drops everything queued or playing on a channel; their futures resolve to False."""
+        with self.lock:
+            dropped = list(self.channels[channel])
+            self.channels[channel].clear()
+        for item in dropped:
+            item.future.set_result(False)
+
+    def is_busy(self, channel=CHANNEL_SPEECH):
+        return bool(self.channels[channel])
+
+    def close(self):
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"AUDIO_PLAYER_ERROR: Could not close the output device: {e}")
@@ -0,0 +1,94 @@
+# benchmark_asr_backends.py
+"""
+Compares the PyTorch and int8 ONNX Runtime Whisper backends on a folder of recorded WAVs.
+
+Accuracy is word error rate against <name>.txt next to each WAV when present,
+otherwise against the PyTorch transcript (i.e. agreement with the reference model).
+
+Usage: python benchmark_asr_backends.py [folder_of_wavs] [--onnx-dir DIR] [--model NAME]
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+
+from asr_audio import WHISPER_SAMPLE_RATE, load_wav
+from asr_backends import OnnxWhisperBackend, TorchWhisperBackend
+
+
+def normalise_words(text):
+    return re.sub(r"[^a-z0-9' ]", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = normalise_words(reference), normalise_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def timed_load(label, factory):
+    started = time.perf_counter()
+    backend = factory()
+    print(f"Loaded {label} in {time.perf_counter() - started:.1f}s")
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("folder", nargs="?", default="./assets/audio/other")
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--onnx-dir", default="./model/whisper-base.en-int8")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.folder, "*.wav")))
+    if not paths:
+        print(f"No WAV files found in {args.folder}")
+        return
+
+    backends = [
+        timed_load("torch", lambda: TorchWhisperBackend(args.model)),
+        timed_load("onnx-int8", lambda: OnnxWhisperBackend(args.onnx_dir)),
+    ]
+
+    totals = {backend.name: {"seconds": 0.0, "wer": 0.0} for backend in backends}
+    audio_seconds = 0.0
+    print(f"\n{'file':32s} {'backend':8s} {'ms':>8s} {'RTF':>6s} {'WER':>6s}  transcript")
+    for path in paths:
+        audio = load_wav(path)
+        audio_seconds += len(audio) / WHISPER_SAMPLE_RATE
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+
+        for backend in backends:
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                text = backend.transcribe(audio)
+            elapsed = (time.perf_counter() - started) / args.repeats
+            if reference is None:
+                reference = text  # the first backend (PyTorch) is the reference
+            wer = word_error_rate(reference, text)
+            totals[backend.name]["seconds"] += elapsed
+            totals[backend.name]["wer"] += wer
+            rtf = elapsed / max(len(audio) / WHISPER_SAMPLE_RATE, 1e-6)
+            print(f"{os.path.basename(path)[:32]:32s} {backend.name:8s} {elapsed * 1000:8.0f} {rtf:6.2f} {wer:6.1%}  {text[:60]}")
+
+    print(f"\n{'backend':8s} {'total s':>8s} {'RTF':>6s} {'mean WER':>9s}")
+    for name, total in totals.items():
+        print(f"{name:8s} {total['seconds']:8.1f} {total['seconds'] / audio_seconds:6.2f} {total['wer'] / len(paths):9.1%}")
+
+
+if __name__ == "__main__":
+    main()
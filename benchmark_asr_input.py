@@ -0,0 +1,76 @@
+# benchmark_asr_input.py
+"""
+Compares the old temp_audio.wav round-trip with the in-memory path into Whisper.
+Each WAV is read as the 16-bit PCM CaptureService keeps in its ring buffer;
+the in-memory path converts that straight to float32, as an utterance is.
+
+Usage: python benchmark_asr_input.py [folder_of_wavs] [--repeats N]
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+import whisper
+
+from asr_audio import WHISPER_SAMPLE_RATE, load_wav, pcm16_to_float32
+
+
+def load_pcm(path):
+    """Returns the WAV as 16 kHz mono 16-bit PCM bytes, like a captured utterance."""
+    audio = load_wav(path)
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def file_path_input(raw_pcm):
+    """What listen_after_prompt used to do: write a WAV, let Whisper decode it through ffmpeg."""
+    fd, temp_path = tempfile.mkstemp(suffix=".wav")
+    try:
+        with os.fdopen(fd, "wb") as f, wave.open(f, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(WHISPER_SAMPLE_RATE)
+            wav.writeframes(raw_pcm)
+        return whisper.load_audio(temp_path)
+    finally:
+        os.remove(temp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("folder", nargs="?", default="./assets/audio/other")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--transcribe", action="store_true", help="also time full transcriptions")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.folder, "*.wav")))
+    if not paths:
+        print(f"No WAV files found in {args.folder}")
+        return
+    model = whisper.load_model("base.en") if args.transcribe else None
+
+    total_saved = 0.0
+    print(f"{'file':40s} {'file path (ms)':>15s} {'in memory (ms)':>15s} {'saved (ms)':>11s}")
+    for path in paths:
+        raw_pcm = load_pcm(path)
+        timings = {}
+        for name, prepare in (("file", file_path_input), ("memory", pcm16_to_float32)):
+            started = time.perf_counter()
+            for _ in range(args.repeats):
+                audio = prepare(raw_pcm)
+                if model:
+                    model.transcribe(audio, fp16=False)
+            timings[name] = (time.perf_counter() - started) / args.repeats * 1000
+        saved = timings["file"] - timings["memory"]
+        total_saved += saved
+        print(f"{os.path.basename(path):40s} {timings['file']:15.1f} {timings['memory']:15.1f} {saved:11.1f}")
+
+    print(f"\nMean latency saved per utterance: {total_saved / len(paths):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
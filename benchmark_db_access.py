@@ -0,0 +1,92 @@
+# benchmark_db_access.py
+"""
+Measures the per-call overhead of the profile database helpers: the old
+connect-per-call pattern in rollback-journal mode against the thread-local
+WAL connections in db_connection.py. Runs against a throwaway profiles.db in
+a temporary folder, so the real one is never touched.
+
+Usage: python benchmark_db_access.py [--calls N]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import database_manager
+import db_connection
+
+
+def legacy_get_user(username):
+    """What every helper used to do: open, query, close."""
+    conn = sqlite3.connect(database_manager.DB_FILE)
+    try:
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def legacy_add_message(user_id, role, content):
+    conn = sqlite3.connect(database_manager.DB_FILE)
+    try:
+        conn.execute(
+            "INSERT INTO conversation_history (user_id, role, content) VALUES (?, ?, ?)",
+            (user_id, role, content)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def time_calls(func, calls, *args):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def run(label, get_user, add_message, calls):
+    read_us = time_calls(get_user, calls, "Admin")
+    write_us = time_calls(add_message, calls, 1, "user", "How did my last interview go?")
+    print(f"{label:28s} {read_us:12.1f} {write_us:12.1f}")
+    return read_us, write_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    original_dir = os.getcwd()
+    print(f"{'':28s} {'read (us)':>12s} {'write (us)':>12s}")
+    try:
+        with tempfile.TemporaryDirectory() as legacy_dir:
+            os.chdir(legacy_dir)
+            database_manager.initialize_database()
+            # initialize_database() switched this file to WAL; put it back to
+            # the rollback journal the old helpers ran with.
+            db_connection.get_connection().execute("PRAGMA journal_mode=DELETE")
+            db_connection.close_connections()
+            before = run("connect per call (journal)", legacy_get_user, legacy_add_message, args.calls)
+            os.chdir(original_dir)
+
+        with tempfile.TemporaryDirectory() as pooled_dir:
+            os.chdir(pooled_dir)
+            database_manager.initialize_database()
+            after = run("thread-local WAL", database_manager.get_user_by_username,
+                        database_manager.add_message_to_history, args.calls)
+            db_connection.close_connections()
+            os.chdir(original_dir)
+    finally:
+        os.chdir(original_dir)
+
+    print(f"{'speed-up':28s} {before[0] / after[0]:11.1f}x {before[1] / after[1]:11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+# capture_service.py
+
+import math
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+import sounddevice as sd
+
+from asr_audio import WHISPER_SAMPLE_RATE, Resampler
+
+FRAME_MS = 30
+# A microphone that failed to open, or whose callback has gone quiet this long
+# (e.g. it was unplugged), is reopened by the next subscribe(), at most this often.
+STALLED_AFTER_S = 2.0
+REOPEN_INTERVAL_S = 2.0
+# How fast the noise floor creeps up when no frame looks quiet, so a noisy
+# room can't leave the VAD stuck in "speech" forever.
+NOISE_RISE_DB_PER_FRAME = 0.02
+
+# Echo suppression: while the app is playing audio, a frame only counts as
+# speech once ECHO_ONSET_FRAMES frames in a row have been ECHO_MARGIN_DB louder
+# than the playback is expected to come back through the microphone.
+# ECHO_TAIL_S covers the room's echo path plus the skew between the input and
+# output device clocks.
+ECHO_TAIL_S = 0.3
+ECHO_MARGIN_DB = 6.0
+ECHO_ONSET_FRAMES = 6
+# The coupling (frame level - playback level) is measured on the app's own
+# playback, starting with the startup cue: the first ECHO_CALIBRATION_FRAMES
+# frames heard during playback are all taken to be echo, and none of them can
+# be speech. After that, every playback frame not accepted as speech is added
+# to the last ECHO_HISTORY_FRAMES, so the estimate follows volume changes.
+ECHO_CALIBRATION_FRAMES = 50
+ECHO_HISTORY_FRAMES = 500
+# A high percentile, so the echo from the loudest, best-aligned playback
+# blocks stays under the bound.
+ECHO_BOUND_PERCENTILE = 90
+ECHO_COUPLING_RANGE_DB = (-60.0, 10.0)
+
+# When an utterance has started and ended, as seen by one consumer. Frames
+# before `pre_roll_ms` of the detected onset are kept so the first syllable
+# isn't clipped, even if they were captured before the consumer subscribed.
+EndOfSpeechPolicy = namedtuple(
+    "EndOfSpeechPolicy",
+    ["end_silence_ms", "max_utterance_s", "start_timeout_s", "min_speech_ms", "pre_roll_ms"],
+    defaults=[None, 120, 300],
+)
+
+COMMAND_POLICY = EndOfSpeechPolicy(end_silence_ms=1000, max_utterance_s=10, start_timeout_s=5)
+ANSWER_POLICY = EndOfSpeechPolicy(end_silence_ms=1500, max_utterance_s=300, start_timeout_s=30)
+INTERVIEW_POLICY = EndOfSpeechPolicy(end_silence_ms=2500, max_utterance_s=300, start_timeout_s=30)
+
+
+def frame_energy_db(frames):
+    """Per-frame energy in dBFS for a (n_frames, frame_len) int16 block."""
+    x = frames.astype(np.float32) / 32768.0
+    return 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+
+
+def zero_crossing_rate(frames):
+    """Per-frame fraction of samples where the signal changes sign."""
+    signs = np.signbit(frames)
+    return np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+
+def classify_frames(frames, noise_db, margin_db=10.0, max_zcr=0.35):
+    """
+    Vectorized energy / zero-crossing VAD. A frame is speech when it is
+    `margin_db` above the noise floor, unless it also has the high crossing
+    rate of hiss or fan noise and isn't loud enough to be voice regardless.
+    Returns (is_speech, energy_db).
+    """
+    energy_db = frame_energy_db(frames)
+    zcr = zero_crossing_rate(frames)
+    loud = energy_db > noise_db + margin_db
+    is_speech = loud & ((zcr < max_zcr) | (energy_db > noise_db + 2 * margin_db))
+    return is_speech, energy_db
+
+
+def _to_float32(samples):
+    return samples.astype(np.float32) / 32768.0
+
+
+class Subscription:
+    """
+    One consumer's view of the microphone: it segments the shared VAD stream
+    into utterances with its own EndOfSpeechPolicy. Use as a context manager
+    so it unsubscribes when done.
+    """
+
+    def __init__(self, service, policy, stream=False, on_onset=None):
+        self.service = service
+        self.policy = policy
+        self.stream = stream
+        self.on_onset = on_onset
+        self.events = queue.Queue()
+        frame_ms = service.frame_ms
+        self.end_silence_frames = math.ceil(policy.end_silence_ms / frame_ms)
+        self.min_speech_frames = max(1, math.ceil(policy.min_speech_ms / frame_ms))
+        self.pre_roll_frames = math.ceil(policy.pre_roll_ms / frame_ms)
+        self.max_frames = int(policy.max_utterance_s * 1000 / frame_ms)
+        # Only audio captured from now on can start an utterance.
+        self.cursor = service.written // service.frame_len
+        self.run = 0
+        self.silence = 0
+        self.start_frame = None
+        self.sent_frame = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.service.unsubscribe(self)
+
+    @property
+    def in_speech(self):
+        return self.start_frame is not None
+
+    def _send_chunk(self, end_frame):
+        if self.stream and end_frame > self.sent_frame:
+            fl = self.service.frame_len
+            self.events.put(("chunk", _to_float32(self.service.read(self.sent_frame * fl, end_frame * fl))))
+            self.sent_frame = end_frame
+
+    def _emit(self, end_frame):
+        # Keep a little trailing silence, but not the whole end-of-speech wait.
+        end_frame -= max(0, self.silence - self.pre_roll_frames)
+        self._send_chunk(end_frame)
+        fl = self.service.frame_len
+        audio = _to_float32(self.service.read(self.start_frame * fl, end_frame * fl))
+        self.events.put(("utterance", audio))
+        self.start_frame = None
+        self.run = 0
+
+    def _on_frames(self, first, is_speech):
+        """Called from the VAD thread with the decisions for frames first, first + 1, ..."""
+        for i, speech in enumerate(is_speech):
+            frame = first + i
+            if frame < self.cursor:
+                continue
+            if self.start_frame is None:
+                self.run = self.run + 1 if speech else 0
+                if self.run >= self.min_speech_frames:
+                    onset = frame - self.run + 1
+                    self.start_frame = max(onset - self.pre_roll_frames, self.service.oldest_frame())
+                    self.sent_frame = self.start_frame
+                    self.silence = 0
+                    if self.on_onset:
+                        self.on_onset()
+            else:
+                self.silence = 0 if speech else self.silence + 1
+                if self.silence >= self.end_silence_frames or frame + 1 - self.start_frame >= self.max_frames:
+                    self._emit(frame + 1)
+        if self.start_frame is not None:
+            self._send_chunk(first + len(is_speech))
+
+    def next_utterance(self, on_chunk=None):
+        """
+        Blocks until the next complete utterance and returns it as 16 kHz float32
+        audio, or None if nobody started speaking within the policy's start timeout.
+        With stream=True, `on_chunk` receives the audio as it is captured.
+        """
+        timeout = self.policy.start_timeout_s
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                kind, audio = self.events.get(timeout=0.1)
+            except queue.Empty:
+                if not self.service.running:
+                    raise RuntimeError("Microphone capture is not running.")
+                if deadline is not None and not self.in_speech and time.monotonic() > deadline:
+                    return None
+                continue
+            if kind == "chunk":
+                if on_chunk:
+                    on_chunk(audio)
+            else:
+                return audio
+
+
+class CaptureService:
+    """
+    Keeps one microphone stream open for the life of the app. The device is
+    opened at its own default rate and resampled to `sample_rate` as blocks
+    arrive. The audio callback only copies them into a ring buffer and then
+    publishes the new write position, so it never takes a lock; a VAD thread
+    classifies complete frames and hands the decisions to every subscriber.
+    If the microphone fails, the next subscribe() tries to reopen it.
+
+    With `echo_reference` set to AudioMixer.played_level_db, frames that are
+    only the app's own playback coming back through the microphone are not
+    speech, so listeners can stay open while the app talks.
+    """
+
+    def __init__(self, sample_rate=WHISPER_SAMPLE_RATE, buffer_seconds=330, frame_ms=FRAME_MS, margin_db=10.0):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.ring = np.zeros(buffer_seconds * sample_rate, dtype=np.int16)
+        self.written = 0  # total samples ever captured; only the audio callback advances it
+        self.frames_done = 0  # frames the VAD has classified
+        self.noise_db = None
+        self.data_ready = threading.Event()
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.stream = None
+        self.resampler = None
+        self.vad_thread = None
+        self.last_open_attempt = None
+        self.open_lock = threading.Lock()
+        self.running = False
+        self.status_flags = 0
+        self.clock = (0, 0.0)  # (written, monotonic time) as of the last audio block
+        self.input_latency = 0.0
+        self.echo_reference = None
+        self.echo_coupling_db = None  # measured once ECHO_CALIBRATION_FRAMES of playback have been heard
+        self.echo_history = deque(maxlen=ECHO_HISTORY_FRAMES)
+        self.echo_run = 0  # playback frames in a row over the echo bound
+
+    def start(self):
+        self.last_open_attempt = time.monotonic()
+        device_rate = int(sd.query_devices(kind='input')['default_samplerate'])
+        self.resampler = None if device_rate == self.sample_rate else Resampler(device_rate, self.sample_rate)
+        stream = sd.InputStream(
+            samplerate=device_rate,
+            channels=1,
+            dtype='int16',
+            blocksize=device_rate * self.frame_ms // 1000,
+            callback=self._on_audio
+        )
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        self.stream = stream
+        self.input_latency = self.stream.latency
+        self.clock = (self.written, time.monotonic())
+        self.running = True
+        self.vad_thread = threading.Thread(target=self._vad_loop, daemon=True)
+        self.vad_thread.start()
+        print(f"CAPTURE: Microphone open at {device_rate} Hz (analysed at {self.sample_rate} Hz), {self.frame_ms} ms frames.")
+
+    def stop(self):
+        self.running = False
+        self.data_ready.set()
+        if self.vad_thread is not None and self.vad_thread is not threading.current_thread():
+            self.vad_thread.join(timeout=1.0)
+        self.vad_thread = None
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception as e:
+                print(f"CAPTURE_ERROR: Could not close the microphone: {e}")
+            self.stream = None
+
+    def _ensure_running(self):
+        """Reopens a microphone that failed to open or has stopped delivering audio."""
+        with self.open_lock:
+            stalled = self.running and time.monotonic() - self.clock[1] > STALLED_AFTER_S
+            if self.running and not stalled:
+                return
+            if self.last_open_attempt is not None and time.monotonic() - self.last_open_attempt < REOPEN_INTERVAL_S:
+                return
+            print("CAPTURE: Microphone is not delivering audio; reopening it.")
+            self.stop()
+            try:
+                self.start()
+            except Exception as e:
+                self.last_open_attempt = time.monotonic()
+                print(f"CAPTURE_ERROR: Could not open the microphone: {e}")
+
+    def _on_audio(self, indata, frames, time_info, status):
+        if status:
+            self.status_flags += 1
+        if self.resampler is not None:
+            resampled = self.resampler.process(indata[:, 0].astype(np.float32))
+            indata = np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)[:, None]
+            frames = len(indata)
+        size = len(self.ring)
+        start = self.written % size
+        end = start + frames
+        if end <= size:
+            self.ring[start:end] = indata[:, 0]
+        else:
+            split = size - start
+            self.ring[start:] = indata[:split, 0]
+            self.ring[:end - size] = indata[split:, 0]
+        # Published only after the copy, so readers never see a half-written block.
+        self.written += frames
+        self.clock = (self.written, time.monotonic())
+        self.data_ready.set()
+
+    def oldest_frame(self):
+        return max(0, self.written - len(self.ring)) // self.frame_len + 1
+
+    def read(self, start, end):
+        """Returns a copy of samples [start, end), by absolute sample index."""
+        size = len(self.ring)
+        start = max(start, self.written - size)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        a, b = start % size, end % size
+        if a < b:
+            return self.ring[a:b].copy()
+        return np.concatenate((self.ring[a:], self.ring[:b]))
+
+    def subscribe(self, policy, stream=False, on_onset=None):
+        """`on_onset` is called from the VAD thread as soon as an utterance starts."""
+        self._ensure_running()
+        subscription = Subscription(self, policy, stream, on_onset)
+        with self.subscribers_lock:
+            self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.subscribers_lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+
+    def _suppress_echo(self, first, energy_db, is_speech):
+        """
+        Clears the speech decision, in place, for frames captured during playback
+        unless they start or continue a run of ECHO_ONSET_FRAMES frames louder
+        than the echo expected at the time, and for every playback frame until
+        the coupling has been calibrated. Returns a mask of the frames captured
+        while something was playing, or None.
+        """
+        reference = self.echo_reference
+        if reference is None:
+            return None
+        written, captured_at = self.clock
+        frame_ends = (first + 1 + np.arange(len(energy_db))) * self.frame_len
+        times = captured_at - self.input_latency - (written - frame_ends) / self.sample_rate
+        played_db = reference(times, ECHO_TAIL_S)
+        if played_db is None:
+            return None
+        playing = np.isfinite(played_db)
+        if not playing.any():
+            self.echo_run = 0
+            return None
+
+        coupling = energy_db - played_db
+        if self.echo_coupling_db is None:
+            self.echo_history.extend(coupling[playing])
+            is_speech &= ~playing
+            if len(self.echo_history) >= ECHO_CALIBRATION_FRAMES:
+                self._update_echo_coupling()
+                print(f"CAPTURE: Echo coupling calibrated at {self.echo_coupling_db:.1f} dB.")
+            return playing
+
+        bound = self.echo_coupling_db + ECHO_MARGIN_DB
+        for i in range(len(is_speech)):
+            if not playing[i]:
+                self.echo_run = 0
+                continue
+            self.echo_run = self.echo_run + 1 if is_speech[i] and coupling[i] > bound else 0
+            if self.echo_run < ECHO_ONSET_FRAMES:
+                is_speech[i] = False
+                self.echo_history.append(coupling[i])
+        self._update_echo_coupling()
+        return playing
+
+    def _update_echo_coupling(self):
+        low, high = ECHO_COUPLING_RANGE_DB
+        measured = float(np.percentile(self.echo_history, ECHO_BOUND_PERCENTILE))
+        self.echo_coupling_db = min(max(measured, low), high)
+
+    def _vad_loop(self):
+        while self.running:
+            self.data_ready.wait(timeout=0.5)
+            self.data_ready.clear()
+            first = max(self.frames_done, self.oldest_frame())
+            count = self.written // self.frame_len - first
+            if count <= 0:
+                continue
+
+            frames = self.read(first * self.frame_len, (first + count) * self.frame_len).reshape(count, self.frame_len)
+            if self.noise_db is None:
+                self.noise_db = float(np.min(frame_energy_db(frames)))
+            is_speech, energy_db = classify_frames(frames, self.noise_db, self.margin_db)
+            playing = self._suppress_echo(first, energy_db, is_speech)
+            # Playback echo isn't room noise, so it mustn't raise the noise floor.
+            quiet = energy_db[~is_speech if playing is None else ~is_speech & ~playing]
+            if quiet.size:
+                self.noise_db = 0.9 * self.noise_db + 0.1 * float(np.median(quiet))
+            else:
+                unmasked = count if playing is None else int(np.count_nonzero(~playing))
+                self.noise_db += NOISE_RISE_DB_PER_FRAME * unmasked
+            self.frames_done = first + count
+
+            with self.subscribers_lock:
+                subscribers = list(self.subscribers)
+            for subscription in subscribers:
+                try:
+                    subscription._on_frames(first, is_speech)
+                except Exception as e:
+                    print(f"CAPTURE_ERROR: Subscriber failed: {e}")
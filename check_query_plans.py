@@ -0,0 +1,130 @@
+# check_query_plans.py
+"""
+Runs EXPLAIN QUERY PLAN on every statement the profile database's data-access
+functions issue and fails if any of them scans a whole table. The statements
+are captured, not copied: the real functions in database_manager.py and
+feedback_manager.py are called with sample data against a fresh, migrated
+profiles.db in a temporary folder, with a trace callback recording the SQL.
+By default the plans come from that database; pass --db to explain them
+against an existing file as it is (opened read-only and not migrated).
+
+Usage: python check_query_plans.py [--db path/to/profiles.db]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+
+import database_manager
+import db_connection
+import feedback_manager
+from data_models import InterviewDataRow
+
+EXPLAINED_STATEMENTS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+def workload():
+    """The data-access calls the app makes, in an order that leaves each one something to find."""
+    interview_id = uuid.uuid4()
+    row = InterviewDataRow(
+        interview_id=interview_id, timestamp=datetime.now(), interview_type="Background",
+        question_number=1, question_text="Tell me about yourself.", answer_text="I like building things.", wpm=120
+    )
+    state = {}
+
+    def add_user():
+        database_manager.add_user("QueryPlanStudent", 20)
+        state["user_id"] = database_manager.get_user_by_username("QueryPlanStudent")["id"]
+
+    return [
+        ("add_user / get_user_by_username", add_user),
+        ("save_feedback_to_db", lambda: feedback_manager.save_feedback_to_db(state["user_id"], [row])),
+        ("add_message_to_history", lambda: database_manager.add_message_to_history(state["user_id"], "user", "Hello")),
+        ("get_conversation_history", lambda: database_manager.get_conversation_history(state["user_id"])),
+        ("remove_last_message", lambda: database_manager.remove_last_message(state["user_id"])),
+        ("update_user_preferences", lambda: database_manager.update_user_preferences(state["user_id"], {})),
+        ("get_all_interviews_for_user", lambda: feedback_manager.get_all_interviews_for_user(state["user_id"])),
+        ("get_interview_summaries_for_user", lambda: feedback_manager.get_interview_summaries_for_user(state["user_id"])),
+        ("get_report_details_by_interview_id",
+         lambda: feedback_manager.get_report_details_by_interview_id(str(interview_id))),
+        ("remove_user", lambda: database_manager.remove_user(state["user_id"])),
+    ]
+
+
+def capture_statements(conn):
+    """Runs the workload on the calling thread's connection. Returns [(function, sql)], each statement once."""
+    statements = []
+    current = [None]
+
+    def trace(sql):
+        if sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            statements.append((current[0], sql.strip()))
+
+    conn.set_trace_callback(trace)
+    try:
+        for name, call in workload():
+            current[0] = name
+            call()
+    finally:
+        conn.set_trace_callback(None)
+
+    seen = set()
+    unique = []
+    for name, sql in statements:
+        if sql not in seen:
+            seen.add(sql)
+            unique.append((name, sql))
+    return unique
+
+
+def full_scans(conn, sql):
+    """Returns the plan steps that read a table from end to end, e.g. 'SCAN feedback_reports'."""
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [row[-1] for row in plan if row[-1].startswith("SCAN ")]
+
+
+def check(conn, statements):
+    failures = 0
+    for name, sql in statements:
+        scans = full_scans(conn, sql)
+        summary = " ".join(sql.split())
+        print(f"{'FULL SCAN' if scans else 'ok':10s} {name}: {summary[:90]}" + (f"\n{'':10s} {'; '.join(scans)}" if scans else ""))
+        failures += bool(scans)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", help="an existing profiles.db to explain the statements against instead of a fresh one")
+    args = parser.parse_args()
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            database_manager.initialize_database()
+            conn = db_connection.get_connection()
+            statements = capture_statements(conn)
+            if not args.db:
+                failures = check(conn, statements)
+            db_connection.close_connections()
+        finally:
+            os.chdir(original_dir)
+
+    if args.db:
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        try:
+            failures = check(conn, statements)
+        finally:
+            conn.close()
+
+    print(f"{failures} of {len(statements)} statements scan a whole table.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
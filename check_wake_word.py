@@ -0,0 +1,93 @@
+# check_wake_word.py
+"""
+Checks that the wake-word gate rejects speech that isn't the wake word. Builds
+the spotter the way the app does (templates and calibration from --templates
+and, with --voice, Piper renderings), then scores a set of voiced sounds with
+random formants plus any recordings in --negatives, and fails if more than
+--max-false-accepts of them pass. Recordings in --positives must pass.
+
+Usage: python check_wake_word.py [--templates DIR] [--voice model.onnx]
+                                 [--negatives DIR] [--positives DIR] [--synthetic N]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from asr_audio import WHISPER_SAMPLE_RATE
+from wake_word import WakeWordSpotter, _load_clips
+
+
+def voiced_sound(rng, sample_rate=WHISPER_SAMPLE_RATE):
+    """One to six vowels with random formants, gliding into each other, at a random pitch."""
+    segments = rng.integers(1, 7)
+    formants = np.column_stack((
+        rng.uniform(250, 850, segments), rng.uniform(700, 2500, segments), rng.uniform(2300, 3200, segments)
+    ))
+    durations = rng.uniform(0.08, 0.25, segments)
+    t = np.arange(int(durations.sum() * sample_rate)) / sample_rate
+    centres = np.cumsum(durations) - durations / 2
+    tracks = [np.interp(t, centres, formants[:, k]) for k in range(3)]
+    f0 = rng.uniform(90, 230) * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    audio = np.zeros(len(t))
+    for harmonic in range(1, int(4000 / f0.max()) + 1):
+        freq = harmonic * f0
+        gain = sum(1 / (1 + ((freq - track) / (60 + 0.05 * track)) ** 2) for track in tracks) / np.sqrt(harmonic)
+        audio += gain * np.sin(harmonic * phase)
+    audio *= np.minimum(1.0, np.minimum(t, t[-1] - t) / 0.02)
+    audio = 0.3 * audio / (np.abs(audio).max() + 1e-9) + 0.003 * rng.standard_normal(len(t))
+    silence = np.zeros(int(0.3 * sample_rate))
+    return np.concatenate((silence, audio, silence)).astype(np.float32)
+
+
+def piper_synthesizer(model_path):
+    from piper.voice import PiperVoice
+    voice = PiperVoice.load(model_path)
+
+    def synthesize(text):
+        chunks = [chunk.audio_int16_array for chunk in voice.synthesize(text)]
+        return np.concatenate(chunks), voice.config.sample_rate
+    return synthesize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--templates", default="./assets/wake_word", help="enrollment WAVs, as WAKE_WORD_DIR")
+    parser.add_argument("--voice", help="a Piper voice to render the wake and negative phrases with, as the app does")
+    parser.add_argument("--negatives", help="recordings of other speech that must be rejected")
+    parser.add_argument("--positives", help="recordings of the wake word that must be accepted")
+    parser.add_argument("--synthetic", type=int, default=200, help="random-formant voiced sounds to test")
+    parser.add_argument("--max-false-accepts", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    synthesize = piper_synthesizer(args.voice) if args.voice else None
+    spotter = WakeWordSpotter.from_sources(args.templates, synthesize)
+    if spotter is None:
+        print("No templates: add WAVs to --templates or pass --voice.")
+        sys.exit(2)
+
+    rng = np.random.default_rng(args.seed)
+    negatives = [voiced_sound(rng) for _ in range(args.synthetic)] + _load_clips(args.negatives)
+    scores = np.array([spotter.score(clip)[0] for clip in negatives])
+    false_accepts = int(np.sum(scores <= spotter.threshold))
+    rate = false_accepts / len(negatives) if negatives else 0.0
+    print(f"threshold {spotter.threshold:.3f}")
+    if negatives:
+        print(f"negatives: {false_accepts} of {len(negatives)} accepted ({100 * rate:.1f}%), "
+              f"closest {scores.min():.3f}, median {np.median(scores):.3f}")
+
+    missed = 0
+    positives = _load_clips(args.positives)
+    if positives:
+        positive_scores = np.array([spotter.score(clip)[0] for clip in positives])
+        missed = int(np.sum(positive_scores > spotter.threshold))
+        print(f"positives: {len(positives) - missed} of {len(positives)} accepted, worst {positive_scores.max():.3f}")
+
+    sys.exit(1 if rate > args.max_false_accepts or missed else 0)
+
+
+if __name__ == "__main__":
+    main()
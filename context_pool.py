@@ -0,0 +1,44 @@
+# context_pool.py
+
+import os
+import queue
+from contextlib import contextmanager
+
+from llama_cpp import Llama
+
+
+def default_pool_size():
+    """One context per four cores, capped so KV caches stay affordable on lab PCs."""
+    return max(1, min(4, (os.cpu_count() or 1) // 4))
+
+
+class ContextPool:
+    """
+    A fixed set of independent llama.cpp contexts over the same GGUF file.
+    The weights are memory-mapped, so every extra context only costs its own
+    KV cache, and the cores are split evenly between contexts so several
+    prompts can be decoded side by side.
+    """
+
+    def __init__(self, model_path, size=None, n_ctx=2048):
+        self.size = size or default_pool_size()
+        threads_per_context = max(1, (os.cpu_count() or 1) // self.size)
+        self.contexts = queue.Queue()
+        for i in range(self.size):
+            print(f"DEBUG: Loading analysis context {i + 1}/{self.size} ({threads_per_context} threads)...")
+            self.contexts.put(Llama(
+                model_path=model_path,
+                n_ctx=n_ctx,
+                n_threads=threads_per_context,
+                n_gpu_layers=0,
+                verbose=False
+            ))
+
+    @contextmanager
+    def acquire(self):
+        """Lends out the next free context for the duration of a with-block."""
+        llm = self.contexts.get()
+        try:
+            yield llm
+        finally:
+            self.contexts.put(llm)
@@ -4,93 +4,168 @@ import sqlite3
 import json
 from datetime import datetime
 
-DB_FILE = "profiles.db"
+from db_connection import DB_FILE, get_connection
 
-def initialize_database():
-    """Initializes the database and creates tables if they don't exist."""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                role TEXT NOT NULL,
-                age INTEGER NOT NULL, 
-                preferences TEXT NOT NULL
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS conversation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS feedback_reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+# Aggregates feedback_reports into interview_summaries rows; append a WHERE
+# clause before the GROUP BY to refresh only some interviews.
+INTERVIEW_SUMMARY_SELECT = """
+    SELECT interview_id, user_id, interview_type, MIN(timestamp), COUNT(*),
+           AVG(star_score), MIN(star_score), MAX(star_score),
+           AVG(keywords_score), MIN(keywords_score), MAX(keywords_score),
+           AVG(professionalism_score), MIN(professionalism_score), MAX(professionalism_score),
+           AVG(wpm), MIN(wpm), MAX(wpm)
+    FROM feedback_reports
+"""
+
+# Schema changes on top of the CREATE TABLE statements below. Each entry
+# upgrades the database by one version and PRAGMA user_version records how
+# many have been applied, so existing profiles.db files catch up on start-up.
+SCHEMA_MIGRATIONS = [
+    # 1: indexes for the per-user and per-interview lookups, which otherwise
+    # scan every feedback row and message ever stored.
+    [
+        # get_all_interviews_for_user: covers the whole DISTINCT ... ORDER BY timestamp
+        "CREATE INDEX IF NOT EXISTS idx_feedback_user_time ON feedback_reports (user_id, timestamp, interview_id, interview_type)",
+        # get_report_details_by_interview_id
+        "CREATE INDEX IF NOT EXISTS idx_feedback_interview ON feedback_reports (interview_id, question_number)",
+        # get_conversation_history, remove_last_message and remove_user
+        "CREATE INDEX IF NOT EXISTS idx_history_user_time ON conversation_history (user_id, timestamp)",
+    ],
+    # 2: one pre-aggregated row per interview, so listing interviews and
+    # charting progress read O(interviews) rows instead of O(questions).
+    [
+        """
+            CREATE TABLE IF NOT EXISTS interview_summaries (
+                interview_id TEXT PRIMARY KEY,
                 user_id INTEGER NOT NULL,
-                interview_id TEXT NOT NULL,
-                timestamp DATETIME NOT NULL,
                 interview_type TEXT NOT NULL,
-                question_number INTEGER NOT NULL,
-                question_text TEXT NOT NULL,
-                answer_text TEXT NOT NULL,
-                wpm INTEGER,
-                star_score INTEGER,
-                star_reason TEXT,
-                keywords_score INTEGER,
-                keywords_reason TEXT,
-                professionalism_score INTEGER,
-                professionalism_reason TEXT,
+                timestamp DATETIME NOT NULL,
+                question_count INTEGER NOT NULL,
+                star_mean REAL,
+                star_min INTEGER,
+                star_max INTEGER,
+                keywords_mean REAL,
+                keywords_min INTEGER,
+                keywords_max INTEGER,
+                professionalism_mean REAL,
+                professionalism_min INTEGER,
+                professionalism_max INTEGER,
+                wpm_mean REAL,
+                wpm_min INTEGER,
+                wpm_max INTEGER,
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
-        """)
-        cursor.execute("SELECT COUNT(*) FROM users")
-        if cursor.fetchone()[0] == 0:
-            print("No users found. Creating default Admin profile...")
-            # MODIFIED: Default screen is now the interview screen
-            admin_preferences = json.dumps({
-                "last_screen": "interview_screen",
-                "onboarding_complete": True 
-            })
-            cursor.execute(
-                "INSERT INTO users (username, role, age, preferences) VALUES (?, ?, ?, ?)",
-                ("Admin", "admin", 99, admin_preferences)
-            )
-        conn.commit()
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_summaries_user_time ON interview_summaries (user_id, timestamp)",
+        # The interview list now reads interview_summaries instead.
+        "DROP INDEX IF EXISTS idx_feedback_user_time",
+        "INSERT OR REPLACE INTO interview_summaries " + INTERVIEW_SUMMARY_SELECT + " GROUP BY interview_id",
+    ],
+]
+
+def refresh_interview_summary(cursor, interview_id):
+    """Rebuilds one interview's summary row from its feedback rows, inside the caller's transaction."""
+    cursor.execute(
+        "INSERT OR REPLACE INTO interview_summaries " + INTERVIEW_SUMMARY_SELECT + " WHERE interview_id = ? GROUP BY interview_id",
+        (interview_id,)
+    )
+
+def _migrate_schema(cursor):
+    """Applies the SCHEMA_MIGRATIONS this database hasn't had yet."""
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    for number, statements in enumerate(SCHEMA_MIGRATIONS[version:], version + 1):
+        print(f"Migrating database schema to version {number}...")
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(f"PRAGMA user_version = {number}")
+
+def initialize_database():
+    """Initializes the database and creates tables if they don't exist."""
+    try:
+        conn = get_connection()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    role TEXT NOT NULL,
+                    age INTEGER NOT NULL, 
+                    preferences TEXT NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS conversation_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS feedback_reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    interview_id TEXT NOT NULL,
+                    timestamp DATETIME NOT NULL,
+                    interview_type TEXT NOT NULL,
+                    question_number INTEGER NOT NULL,
+                    question_text TEXT NOT NULL,
+                    answer_text TEXT NOT NULL,
+                    wpm INTEGER,
+                    star_score INTEGER,
+                    star_reason TEXT,
+                    keywords_score INTEGER,
+                    keywords_reason TEXT,
+                    professionalism_score INTEGER,
+                    professionalism_reason TEXT,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            _migrate_schema(cursor)
+            cursor.execute("SELECT COUNT(*) FROM users")
+            if cursor.fetchone()[0] == 0:
+                print("No users found. Creating default Admin profile...")
+                # MODIFIED: Default screen is now the interview screen
+                admin_preferences = json.dumps({
+                    "last_screen": "interview_screen",
+                    "onboarding_complete": True 
+                })
+                cursor.execute(
+                    "INSERT INTO users (username, role, age, preferences) VALUES (?, ?, ?, ?)",
+                    ("Admin", "admin", 99, admin_preferences)
+                )
     except sqlite3.Error as e:
         print(f"Database error during initialization: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def get_all_users():
     """Fetches all users from the database."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute("SELECT id, username, role, age FROM users")
         users = [dict(row) for row in cursor.fetchall()]
         return users
     except sqlite3.Error as e:
         print(f"Database error fetching users: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def get_user_by_username(username):
     """Fetches a single user's complete data by their username."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
         user_data = cursor.fetchone()
         if user_data:
@@ -99,71 +174,71 @@ def get_user_by_username(username):
     except sqlite3.Error as e:
         print(f"Database error fetching user {username}: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def add_user(name, age):
     """Adds a new user to the database with onboarding set to false."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        # MODIFIED: Default screen is now the interview screen
-        new_user_prefs = json.dumps({
-            "last_screen": "interview_screen",
-            "onboarding_complete": False,
-            "profile_summary": {}
-        })
-        cursor.execute(
-            "INSERT INTO users (username, role, age, preferences) VALUES (?, ?, ?, ?)",
-            (name, "user", int(age), new_user_prefs)
-        )
-        conn.commit()
-        return True, f"Success: User '{name}' added."
+        conn = get_connection()
+        with conn:
+            cursor = conn.cursor()
+            # MODIFIED: Default screen is now the interview screen
+            new_user_prefs = json.dumps({
+                "last_screen": "interview_screen",
+                "onboarding_complete": False,
+                "profile_summary": {}
+            })
+            cursor.execute(
+                "INSERT INTO users (username, role, age, preferences) VALUES (?, ?, ?, ?)",
+                (name, "user", int(age), new_user_prefs)
+            )
+            return True, f"Success: User '{name}' added."
     except sqlite3.IntegrityError:
         return False, f"Error: Username '{name}' already exists."
     except sqlite3.Error as e:
         return False, f"Database Error: {e}"
-    finally:
-        if conn:
-            conn.close()
 
 def remove_user(user_id):
     """Removes a user and their entire conversation history."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM conversation_history WHERE user_id = ?", (user_id,))
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        conn.commit()
-        return True, "Success: User and their history removed."
+        conn = get_connection()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM conversation_history WHERE user_id = ?", (user_id,))
+            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            return True, "Success: User and their history removed."
     except sqlite3.Error as e:
         return False, f"Database Error: {e}"
-    finally:
-        if conn:
-            conn.close()
+
+def insert_message(cursor, user_id, role, content, timestamp=None):
+    """Inserts one history row inside the caller's transaction; `timestamp` defaults to now (UTC)."""
+    cursor.execute(
+        "INSERT INTO conversation_history (user_id, role, content, timestamp) VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+        (user_id, role, content, timestamp)
+    )
+
+def delete_last_message(cursor, user_id):
+    """Deletes a user's most recent history row inside the caller's transaction."""
+    cursor.execute(
+        "SELECT id FROM conversation_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT 1",
+        (user_id,)
+    )
+    last_message = cursor.fetchone()
+    if last_message:
+        cursor.execute("DELETE FROM conversation_history WHERE id = ?", last_message)
 
 def add_message_to_history(user_id, role, content):
     """Adds a single message to the conversation history table."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO conversation_history (user_id, role, content) VALUES (?, ?, ?)",
-            (user_id, role, content)
-        )
-        conn.commit()
+        conn = get_connection()
+        with conn:
+            insert_message(conn.cursor(), user_id, role, content)
     except sqlite3.Error as e:
         print(f"Database error adding message: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def get_conversation_history(user_id):
     """Retrieves and formats the entire conversation for a user."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         cursor.execute(
             "SELECT role, content FROM conversation_history WHERE user_id = ? ORDER BY timestamp ASC",
             (user_id,)
@@ -173,42 +248,26 @@ def get_conversation_history(user_id):
     except sqlite3.Error as e:
         print(f"Database error getting history: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def update_user_preferences(user_id, new_preferences):
     """Updates the preferences JSON for a specific user."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        preferences_json = json.dumps(new_preferences)
-        cursor.execute(
-            "UPDATE users SET preferences = ? WHERE id = ?",
-            (preferences_json, user_id)
-        )
-        conn.commit()
+        conn = get_connection()
+        with conn:
+            cursor = conn.cursor()
+            preferences_json = json.dumps(new_preferences)
+            cursor.execute(
+                "UPDATE users SET preferences = ? WHERE id = ?",
+                (preferences_json, user_id)
+            )
     except sqlite3.Error as e:
         print(f"Database error updating preferences: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def remove_last_message(user_id):
     """Removes the most recent message for a user."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id FROM conversation_history WHERE user_id = ? ORDER BY timestamp DESC LIMIT 1",
-            (user_id,)
-        )
-        last_message = cursor.fetchone()
-        if last_message:
-            cursor.execute("DELETE FROM conversation_history WHERE id = ?", last_message)
-            conn.commit()
+        conn = get_connection()
+        with conn:
+            delete_last_message(conn.cursor(), user_id)
     except sqlite3.Error as e:
         print(f"Database error removing last message: {e}")
-    finally:
-        if conn:
-            conn.close()
@@ -0,0 +1,48 @@
+# db_connection.py
+
+import sqlite3
+import threading
+
+DB_FILE = "profiles.db"
+
+# How long a writer waits for another thread's write transaction before
+# giving up with "database is locked".
+BUSY_TIMEOUT_MS = 5000
+# Prepared statements kept per connection. Every query in the app is a
+# constant SQL string, so after the first call each one is reused as is.
+STATEMENT_CACHE_SIZE = 64
+
+_local = threading.local()
+
+
+def _open(db_file):
+    conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE)
+    # WAL lets the Tk thread read while a listener or the interview thread
+    # writes; with WAL, synchronous=NORMAL only syncs at checkpoints, and a
+    # power cut can at worst lose the last few commits, never corrupt the file.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def get_connection(db_file=DB_FILE):
+    """
+    Returns the calling thread's connection to `db_file`, opening it on first
+    use. Connections live as long as their thread, so callers must not close
+    them; use `with conn:` to commit, or roll back on an exception.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = connections[db_file] = _open(db_file)
+    return conn
+
+
+def close_connections():
+    """Closes the calling thread's connections, e.g. before the app exits."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
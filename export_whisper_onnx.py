@@ -0,0 +1,165 @@
+# export_whisper_onnx.py
+"""
+Exports a Whisper checkpoint to int8 ONNX models for the ONNX Runtime ASR backend.
+
+Usage: python export_whisper_onnx.py [checkpoint] [--out DIR]
+"""
+
+import argparse
+import base64
+import json
+import os
+
+import numpy as np
+import torch
+import whisper
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from whisper.tokenizer import get_tokenizer
+
+from asr_backends import (
+    ONNX_CONFIG_FILE, ONNX_DECODER_FILE, ONNX_ENCODER_FILE, ONNX_MEL_FILTERS_FILE, ONNX_VOCAB_FILE,
+)
+
+
+def _attention(q, k, v, n_head, mask=None):
+    """whisper.model.MultiHeadAttention.qkv_attention, on explicit keys and values."""
+    scale = (q.shape[-1] // n_head) ** -0.25
+    q = q.reshape(q.shape[0], q.shape[1], n_head, -1).permute(0, 2, 1, 3) * scale
+    k = k.reshape(k.shape[0], k.shape[1], n_head, -1).permute(0, 2, 3, 1) * scale
+    v = v.reshape(v.shape[0], v.shape[1], n_head, -1).permute(0, 2, 1, 3)
+    qk = q @ k
+    if mask is not None:
+        qk = qk + mask
+    weights = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+    return (weights @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+
+
+class CrossAttentionEncoder(torch.nn.Module):
+    """
+    The audio encoder followed by every decoder layer's cross-attention key and
+    value projections, which only depend on the audio and so are computed once per window.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.encoder = model.encoder
+        self.blocks = model.decoder.blocks
+
+    def forward(self, mel):
+        audio_features = self.encoder(mel)
+        cross_k = torch.stack([block.cross_attn.key(audio_features) for block in self.blocks])
+        cross_v = torch.stack([block.cross_attn.value(audio_features) for block in self.blocks])
+        return cross_k, cross_v
+
+
+class CachedDecoder(torch.nn.Module):
+    """
+    The text decoder with its self-attention keys and values passed in and out
+    explicitly (whisper keeps them in forward hooks, which torch.onnx can't
+    trace), so each greedy step only runs the newest token instead of the whole sequence.
+    """
+
+    def __init__(self, decoder):
+        super().__init__()
+        self.decoder = decoder
+
+    def forward(self, tokens, cross_k, cross_v, past_k, past_v):
+        decoder = self.decoder
+        offset = past_k.shape[2]
+        n_new = tokens.shape[-1]
+        x = decoder.token_embedding(tokens) + decoder.positional_embedding[offset:offset + n_new]
+        mask = decoder.mask[offset:offset + n_new, :offset + n_new]
+        keys, values = [], []
+        for i, block in enumerate(decoder.blocks):
+            h = block.attn_ln(x)
+            k = torch.cat([past_k[i], block.attn.key(h)], dim=1)
+            v = torch.cat([past_v[i], block.attn.value(h)], dim=1)
+            keys.append(k)
+            values.append(v)
+            x = x + block.attn.out(_attention(block.attn.query(h), k, v, block.attn.n_head, mask))
+            h = block.cross_attn_ln(x)
+            x = x + block.cross_attn.out(_attention(block.cross_attn.query(h), cross_k[i], cross_v[i], block.cross_attn.n_head))
+            x = x + block.mlp(block.mlp_ln(x))
+        x = decoder.ln(x)
+        logits = (x @ decoder.token_embedding.weight.to(x.dtype).T).float()
+        return logits, torch.stack(keys), torch.stack(values)
+
+
+def export(checkpoint, out_dir, opset=17):
+    model = whisper.load_model(checkpoint, device="cpu").eval()
+    dims = model.dims
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages)
+    os.makedirs(out_dir, exist_ok=True)
+
+    mel = torch.zeros(1, dims.n_mels, 3000)
+    tokens = torch.tensor([list(tokenizer.sot_sequence_including_notimestamps)])
+    past = torch.zeros(dims.n_text_layer, 1, 1, dims.n_text_state)
+    with torch.no_grad():
+        cross_k, cross_v = CrossAttentionEncoder(model)(mel)
+        float_encoder = os.path.join(out_dir, "encoder.fp32.onnx")
+        float_decoder = os.path.join(out_dir, "decoder.fp32.onnx")
+        torch.onnx.export(
+            CrossAttentionEncoder(model), (mel,), float_encoder,
+            input_names=["mel"], output_names=["cross_k", "cross_v"], opset_version=opset,
+        )
+        torch.onnx.export(
+            CachedDecoder(model.decoder), (tokens, cross_k, cross_v, past, past), float_decoder,
+            input_names=["tokens", "cross_k", "cross_v", "past_k", "past_v"],
+            output_names=["logits", "present_k", "present_v"],
+            dynamic_axes={
+                "tokens": {1: "n_tokens"}, "logits": {1: "n_tokens"},
+                "past_k": {2: "n_past"}, "past_v": {2: "n_past"},
+                "present_k": {2: "n_total"}, "present_v": {2: "n_total"},
+            },
+            opset_version=opset,
+        )
+
+    for source, target in ((float_encoder, ONNX_ENCODER_FILE), (float_decoder, ONNX_DECODER_FILE)):
+        print(f"Quantizing {os.path.basename(source)} to int8...")
+        quantize_dynamic(source, os.path.join(out_dir, target), weight_type=QuantType.QInt8)
+        os.remove(source)
+
+    encoding = tokenizer.encoding
+    with open(os.path.join(out_dir, ONNX_VOCAB_FILE), "w", encoding="utf-8") as f:
+        for token, rank in sorted(encoding._mergeable_ranks.items(), key=lambda item: item[1]):
+            f.write(f"{base64.b64encode(token).decode()} {rank}\n")
+
+    suppress = set(tokenizer.non_speech_tokens)
+    suppress.update([tokenizer.transcribe, tokenizer.translate, tokenizer.sot, tokenizer.sot_prev, tokenizer.sot_lm])
+    if tokenizer.no_speech is not None:
+        suppress.add(tokenizer.no_speech)
+    config = {
+        "model_name": os.path.splitext(os.path.basename(checkpoint))[0],
+        "n_mels": dims.n_mels,
+        "n_text_ctx": dims.n_text_ctx,
+        "n_text_layer": dims.n_text_layer,
+        "n_text_state": dims.n_text_state,
+        "decoder_kv_cache": True,
+        "pat_str": encoding._pat_str,
+        "special_tokens": encoding._special_tokens,
+        "sot_sequence": list(tokenizer.sot_sequence_including_notimestamps),
+        "sot_prev": tokenizer.sot_prev,
+        "eot": tokenizer.eot,
+        "timestamp_begin": tokenizer.timestamp_begin,
+        "blank_tokens": tokenizer.encode(" ") + [tokenizer.eot],
+        "suppress_tokens": sorted(suppress),
+    }
+    with open(os.path.join(out_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    filters = whisper.audio.mel_filters("cpu", dims.n_mels).numpy()
+    np.save(os.path.join(out_dir, ONNX_MEL_FILTERS_FILE), filters)
+    print(f"Exported {checkpoint} to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("checkpoint", nargs="?", default="./model/base.en.pt")
+    parser.add_argument("--out", default="./model/whisper-base.en-int8")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export(args.checkpoint, args.out, args.opset)
+
+
+if __name__ == "__main__":
+    main()
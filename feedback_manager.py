@@ -2,8 +2,34 @@
 
 import sqlite3
 from data_models import InterviewDataRow
+from database_manager import refresh_interview_summary
+from db_connection import DB_FILE, get_connection
 
-DB_FILE = "profiles.db"
+def insert_feedback_rows(cursor, user_id: int, pydantic_rows: list[InterviewDataRow]):
+    """
+    Inserts one interview's feedback rows and refreshes its interview_summaries
+    row, inside the caller's transaction so the two never disagree.
+    """
+    rows_to_insert = []
+    for row_model in pydantic_rows:
+        data = row_model.model_dump(mode='json')
+        data['user_id'] = user_id
+        rows_to_insert.append(data)
+
+    cursor.executemany("""
+        INSERT INTO feedback_reports (
+            user_id, interview_id, timestamp, interview_type, question_number,
+            question_text, answer_text, wpm, star_score, star_reason,
+            keywords_score, keywords_reason, professionalism_score, professionalism_reason
+        ) VALUES (
+            :user_id, :interview_id, :timestamp, :interview_type, :question_number,
+            :question_text, :answer_text, :wpm, :star_score, :star_reason,
+            :keywords_score, :keywords_reason, :professionalism_score, :professionalism_reason
+        )
+    """, rows_to_insert)
+
+    for interview_id in {data['interview_id'] for data in rows_to_insert}:
+        refresh_interview_summary(cursor, interview_id)
 
 def save_feedback_to_db(user_id: int, pydantic_rows: list[InterviewDataRow]):
     """
@@ -13,52 +39,28 @@ def save_feedback_to_db(user_id: int, pydantic_rows: list[InterviewDataRow]):
         print("No validated feedback rows to save.")
         return
 
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-
-        rows_to_insert = []
-        for row_model in pydantic_rows:
-            data = row_model.model_dump(mode='json')
-            data['user_id'] = user_id
-            rows_to_insert.append(data)
-        
-        cursor.executemany("""
-            INSERT INTO feedback_reports (
-                user_id, interview_id, timestamp, interview_type, question_number,
-                question_text, answer_text, wpm, star_score, star_reason,
-                keywords_score, keywords_reason, professionalism_score, professionalism_reason
-            ) VALUES (
-                :user_id, :interview_id, :timestamp, :interview_type, :question_number,
-                :question_text, :answer_text, :wpm, :star_score, :star_reason,
-                :keywords_score, :keywords_reason, :professionalism_score, :professionalism_reason
-            )
-        """, rows_to_insert)
-
-        conn.commit()
+        conn = get_connection()
+        with conn:
+            insert_feedback_rows(conn.cursor(), user_id, pydantic_rows)
+
         print(f"Report saved to database for user_id: {user_id} with Interview ID: {pydantic_rows[0].interview_id}")
 
     except sqlite3.Error as e:
         print(f"Database error saving feedback report: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 def get_all_interviews_for_user(user_id: int):
     """
     Fetches a summary of all past interview sessions for a specific user.
     Returns a list of dictionaries, each containing interview_id, type, and timestamp.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
 
         cursor.execute("""
-            SELECT DISTINCT interview_id, interview_type, timestamp
-            FROM feedback_reports
+            SELECT interview_id, interview_type, timestamp
+            FROM interview_summaries
             WHERE user_id = ?
             ORDER BY timestamp DESC
         """, (user_id,))
@@ -69,9 +71,6 @@ def get_all_interviews_for_user(user_id: int):
     except sqlite3.Error as e:
         print(f"Database error fetching interview list: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 
 def get_report_details_by_interview_id(interview_id: str):
@@ -79,11 +78,9 @@ def get_report_details_by_interview_id(interview_id: str):
     Fetches all the feedback details (all question/answer rows) for a
     single, specific interview session.
     """
-    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
 
         cursor.execute("""
             SELECT * FROM feedback_reports
@@ -97,6 +94,25 @@ def get_report_details_by_interview_id(interview_id: str):
     except sqlite3.Error as e:
         print(f"Database error fetching report details: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
+
+
+def get_interview_summaries_for_user(user_id: int):
+    """
+    Fetches every interview's question count and mean/min/max STAR, keywords,
+    professionalism and WPM scores for a user, oldest first, for progress views.
+    """
+    try:
+        cursor = get_connection().cursor()
+        cursor.row_factory = sqlite3.Row
+
+        cursor.execute("""
+            SELECT * FROM interview_summaries
+            WHERE user_id = ?
+            ORDER BY timestamp ASC
+        """, (user_id,))
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    except sqlite3.Error as e:
+        print(f"Database error fetching interview summaries: {e}")
+        return []
@@ -2,20 +2,29 @@
 import prompts
 import re
 
-def get_interview_response(gemma_model, process_func, current_session_log, prompt_template):
+def get_interview_response(gemma_model, process_func, current_session_log, prompt_template, history_window=None):
     """
     Gets the next response for an interview.
+    If a history_window is given, it decides how much history fits in the prompt.
     """
     print(">> Gemma is thinking...")
     
-    prompt = prompt_template.format(
-        history=format_history_for_prompt(current_session_log)
-    )
+    if history_window:
+        history_text = history_window.format_history(current_session_log, prompt_template)
+    else:
+        history_text = format_history_for_prompt(current_session_log)
     
-    full_prompt = f"[INST]\n{prompt}\n[/INST]"
+    full_prompt = build_full_prompt(prompt_template, history_text)
     
     return process_func(full_prompt, max_tokens=250)
 
+def build_full_prompt(prompt_template, history_text):
+    """
+    Fills an interview template with the history and wraps it as an instruction.
+    """
+    prompt = prompt_template.format(history=history_text)
+    return f"[INST]\n{prompt}\n[/INST]"
+
 def format_history_for_prompt(history):
     """
     Formats a list of dictionaries into a string for the LLM prompt.
@@ -0,0 +1,94 @@
+# history_manager.py
+
+import threading
+
+import prompts
+from gemma_logic import format_history_for_prompt, build_full_prompt
+
+
+class InterviewHistoryWindow:
+    """
+    Keeps interview prompts inside the model's context window. The last
+    `keep_turns` question/answer pairs are sent verbatim; older turns are
+    folded into a running summary that is refreshed in a background thread.
+    Whatever happens, prompt tokens plus `max_tokens` never exceed `n_ctx`.
+    """
+
+    def __init__(self, count_tokens, summarize_func, n_ctx=2048, max_tokens=250, keep_turns=3):
+        self.count_tokens = count_tokens
+        self.summarize_func = summarize_func
+        self.token_budget = n_ctx - max_tokens
+        self.keep_messages = keep_turns * 2
+        self.summary = ""
+        self.summarized_count = 0  # messages [0:summarized_count] are covered by the summary
+        self.summary_thread = None
+        self.lock = threading.Lock()
+
+    def _summarize(self, messages, end_index):
+        with self.lock:
+            previous_summary = self.summary or "Nothing yet."
+        prompt = prompts.HISTORY_SUMMARY_PROMPT.format(
+            summary=previous_summary,
+            new_messages=format_history_for_prompt(messages)
+        )
+        try:
+            new_summary = self.summarize_func(f"[INST]\n{prompt}\n[/INST]", max_tokens=200)
+        except Exception as e:
+            print(f"Error updating history summary: {e}")
+            return
+        if new_summary:
+            with self.lock:
+                self.summary = new_summary
+                self.summarized_count = end_index
+            print(f"DEBUG: History summary now covers {end_index} messages.")
+
+    def observe(self, history):
+        """Starts a background summary update if turns have slid out of the verbatim window."""
+        window_start = max(0, len(history) - self.keep_messages)
+        with self.lock:
+            start = self.summarized_count
+            busy = self.summary_thread is not None and self.summary_thread.is_alive()
+        if window_start <= start or busy:
+            return
+        self.summary_thread = threading.Thread(
+            target=self._summarize,
+            args=(list(history[start:window_start]), window_start),
+            daemon=True
+        )
+        self.summary_thread.start()
+
+    def _render(self, summary, messages):
+        history_text = format_history_for_prompt(messages)
+        if summary:
+            history_text = f"Summary of the earlier conversation:\n{summary}\n\nMost recent exchanges:\n{history_text}"
+        return history_text
+
+    def _truncate_to_tokens(self, text, max_tokens):
+        """Keeps the end of a text, which for an answer is usually the part the next question builds on."""
+        words = text.split()
+        while words and self.count_tokens(" ".join(words)) > max_tokens:
+            words = words[max(1, len(words) // 10):]
+        return " ".join(words)
+
+    def format_history(self, history, prompt_template):
+        """Returns the history text to place in prompt_template, sized to fit the token budget."""
+        self.observe(history)
+        with self.lock:
+            summary = self.summary
+            start = min(self.summarized_count, len(history))
+        # Turns the summary doesn't cover yet stay verbatim for as long as they fit.
+        messages = [dict(msg) for msg in history[start:]]
+
+        def fits(summary_text, msgs):
+            full_prompt = build_full_prompt(prompt_template, self._render(summary_text, msgs))
+            return self.count_tokens(full_prompt) <= self.token_budget
+
+        while len(messages) > 1 and not fits(summary, messages):
+            messages.pop(0)
+        if not fits(summary, messages):
+            summary = ""
+        if messages and not fits(summary, messages):
+            overflow = self.count_tokens(build_full_prompt(prompt_template, self._render("", messages))) - self.token_budget
+            last = messages[-1]
+            last['content'] = self._truncate_to_tokens(last['content'], max(0, self.count_tokens(last['content']) - overflow))
+        return self._render(summary, messages)
@@ -0,0 +1,302 @@
+# inference_server.py
+
+import itertools
+import multiprocessing
+import queue
+import threading
+
+# Lower numbers are served first. Interactive turns also pause background
+# generation between tokens, so a spoken reply never waits on report scoring.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+DEFAULT_STOP = ["</s>", "[INST]", "User:", "Assistant:"]
+
+
+# --- Worker process ---
+
+class _Job:
+    def __init__(self, message):
+        self.id = message["id"]
+        self.prompt = message["prompt"]
+        self.max_tokens = message["max_tokens"]
+        self.stop = message["stop"]
+        self.sampling = message["sampling"]
+        self.priority = message["priority"]
+        self.stream = message["stream"]
+        self.cancelled = threading.Event()
+
+
+def _worker_main(conn, config):
+    """Entry point of the inference process: owns every llama.cpp context and serves requests from conn."""
+    from llama_cpp import Llama
+    from context_pool import ContextPool
+    from prefix_cache import PrefixCache
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    try:
+        primary = Llama(model_path=config["model_path"], n_ctx=config["n_ctx"], n_gpu_layers=0, verbose=True)
+        # Serializes everything that evaluates on the primary context, including prefix restores.
+        primary_lock = threading.Lock()
+        prefix_cache = PrefixCache(primary, config["model_path"], persist=config["persist_prefix_cache"], lock=primary_lock)
+        for name, prefix_text in config["prefixes"].items():
+            prefix_cache.register(name, prefix_text)
+        pool = ContextPool(config["model_path"], size=config["background_contexts"], n_ctx=config["n_ctx"])
+    except Exception as e:
+        send({"type": "fatal", "message": f"{type(e).__name__}: {e}"})
+        return
+
+    interactive_jobs = queue.PriorityQueue()
+    background_jobs = queue.PriorityQueue()
+    jobs_by_id = {}
+    sequence = itertools.count()
+    interactive_idle = threading.Event()
+    interactive_idle.set()
+
+    def run_job(llm, job, yield_to_interactive):
+        pieces = []
+        try:
+            for chunk in llm(job.prompt, max_tokens=job.max_tokens, stop=job.stop, echo=False, stream=True, **job.sampling):
+                if yield_to_interactive:
+                    while not interactive_idle.is_set() and not job.cancelled.is_set():
+                        interactive_idle.wait(timeout=0.05)
+                if job.cancelled.is_set():
+                    break
+                piece = chunk['choices'][0]['text']
+                pieces.append(piece)
+                if job.stream:
+                    send({"id": job.id, "type": "chunk", "text": piece})
+            if job.cancelled.is_set():
+                send({"id": job.id, "type": "cancelled"})
+            else:
+                send({"id": job.id, "type": "done", "text": "".join(pieces).strip()})
+        except Exception as e:
+            send({"id": job.id, "type": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            jobs_by_id.pop(job.id, None)
+
+    def interactive_dispatcher():
+        while True:
+            _, _, job = interactive_jobs.get()
+            if job is None:
+                return
+            if job.cancelled.is_set():
+                send({"id": job.id, "type": "cancelled"})
+                continue
+            interactive_idle.clear()
+            try:
+                with primary_lock:
+                    cached_prefix = prefix_cache.restore(job.prompt)
+                    print(f"PREFIX_CACHE: {'hit on ' + repr(cached_prefix) if cached_prefix else 'miss'} {prefix_cache.stats()}")
+                    run_job(primary, job, yield_to_interactive=False)
+            finally:
+                if interactive_jobs.empty():
+                    interactive_idle.set()
+
+    def background_dispatcher():
+        while True:
+            _, _, job = background_jobs.get()
+            if job is None:
+                return
+            if job.cancelled.is_set():
+                send({"id": job.id, "type": "cancelled"})
+                continue
+            with pool.acquire() as llm:
+                run_job(llm, job, yield_to_interactive=True)
+
+    threads = [threading.Thread(target=interactive_dispatcher, daemon=True)]
+    threads += [threading.Thread(target=background_dispatcher, daemon=True) for _ in range(pool.size)]
+    for thread in threads:
+        thread.start()
+
+    send({"type": "ready", "background_contexts": pool.size})
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        op = message["op"]
+        if op == "complete":
+            job = _Job(message)
+            jobs_by_id[job.id] = job
+            target = interactive_jobs if job.priority < PRIORITY_BACKGROUND else background_jobs
+            target.put((job.priority, next(sequence), job))
+        elif op == "cancel":
+            job = jobs_by_id.get(message["id"])
+            if job:
+                job.cancelled.set()
+        elif op == "count_tokens":
+            # Completions are run with BOS, so it counts towards the prompt's budget too.
+            count = len(primary.tokenize(message["text"].encode("utf-8"), add_bos=True, special=True))
+            send({"id": message["id"], "type": "done", "count": count})
+        elif op == "stats":
+            send({"id": message["id"], "type": "done", "stats": prefix_cache.stats()})
+        elif op == "shutdown":
+            break
+
+    for job in list(jobs_by_id.values()):
+        job.cancelled.set()
+    interactive_jobs.put((-1, -1, None))
+    for _ in range(pool.size):
+        background_jobs.put((-1, -1, None))
+
+
+# --- GUI-side client ---
+
+class InferenceRequest:
+    """Handle for one request: iterate it for streamed text, call result() for the full reply, or cancel()."""
+
+    def __init__(self, client, request_id):
+        self.client = client
+        self.id = request_id
+        self.events = queue.Queue()
+        self.text = None
+
+    def __iter__(self):
+        while True:
+            event = self.events.get()
+            kind = event["type"]
+            if kind == "chunk":
+                yield event["text"]
+            elif kind == "done":
+                self.text = event.get("text", "")
+                return
+            elif kind == "cancelled":
+                self.text = ""
+                return
+            else:
+                raise RuntimeError(f"Inference worker error: {event.get('message')}")
+
+    def result(self):
+        for _ in self:
+            pass
+        return self.text
+
+    def cancel(self):
+        self.client._send({"op": "cancel", "id": self.id})
+
+
+class InferenceClient:
+    """
+    Runs Gemma in a separate process and talks to it over a pipe, so every app
+    thread shares one prioritised request queue and a model crash can't take
+    the Tk window down with it. A crashed worker is restarted on the next request.
+    """
+
+    def __init__(self, model_path, n_ctx=2048, prefixes=None, persist_prefix_cache=True, background_contexts=None):
+        self.config = {
+            "model_path": model_path,
+            "n_ctx": n_ctx,
+            "prefixes": prefixes or {},
+            "persist_prefix_cache": persist_prefix_cache,
+            "background_contexts": background_contexts,
+        }
+        self.process = None
+        self.conn = None
+        self.pending = {}
+        self.ids = itertools.count(1)
+        self.send_lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.background_contexts = 0
+        self.closing = False
+
+    def start(self):
+        """Starts the worker and blocks until every context is loaded."""
+        with self.start_lock:
+            if self.process is not None and self.process.is_alive():
+                return
+            ctx = multiprocessing.get_context("spawn")
+            parent_conn, child_conn = ctx.Pipe()
+            self.process = ctx.Process(target=_worker_main, args=(child_conn, self.config), daemon=True)
+            self.process.start()
+            child_conn.close()
+
+            try:
+                ready = parent_conn.recv()
+            except (EOFError, OSError):
+                ready = {"type": "fatal", "message": f"worker exited with code {self.process.exitcode}"}
+            if ready["type"] != "ready":
+                self.process.join(timeout=5)
+                raise RuntimeError(f"Inference worker failed to start: {ready.get('message')}")
+            self.background_contexts = ready["background_contexts"]
+            self.conn = parent_conn
+            threading.Thread(target=self._receive_loop, args=(parent_conn,), daemon=True).start()
+            print(f"DEBUG: Inference worker READY (pid {self.process.pid}).")
+
+    def _receive_loop(self, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            request = self.pending.get(message.get("id"))
+            if request is None:
+                continue
+            request.events.put(message)
+            if message["type"] != "chunk":
+                self.pending.pop(message["id"], None)
+
+        if not self.closing:
+            print("INFERENCE_CLIENT: Worker connection lost; failing pending requests.")
+        for request_id in list(self.pending):
+            self.pending.pop(request_id).events.put({"type": "error", "message": "worker process exited"})
+
+    def _send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def _request(self, message):
+        if self.process is None or not self.process.is_alive():
+            print("INFERENCE_CLIENT: Worker is not running; restarting it.")
+            self.start()
+        request = InferenceRequest(self, next(self.ids))
+        self.pending[request.id] = request
+        message["id"] = request.id
+        try:
+            self._send(message)
+        except (OSError, ValueError) as e:
+            self.pending.pop(request.id, None)
+            request.events.put({"type": "error", "message": str(e)})
+        return request
+
+    def submit(self, prompt, max_tokens=150, stop=None, sampling=None, priority=PRIORITY_INTERACTIVE, stream=False):
+        return self._request({
+            "op": "complete",
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "stop": stop or DEFAULT_STOP,
+            "sampling": sampling or {},
+            "priority": priority,
+            "stream": stream,
+        })
+
+    def count_tokens(self, text):
+        request = self._request({"op": "count_tokens", "text": text})
+        event = request.events.get()
+        if event["type"] != "done":
+            raise RuntimeError(f"Inference worker error: {event.get('message')}")
+        return event["count"]
+
+    def stats(self):
+        request = self._request({"op": "stats"})
+        event = request.events.get()
+        return event.get("stats", {})
+
+    def cancel_all(self):
+        for request in list(self.pending.values()):
+            request.cancel()
+
+    def shutdown(self):
+        self.closing = True
+        if self.process is not None and self.process.is_alive():
+            try:
+                self._send({"op": "shutdown"})
+            except (OSError, ValueError):
+                pass
+            self.process.join(timeout=5)
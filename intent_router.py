@@ -0,0 +1,150 @@
+# intent_router.py
+
+import difflib
+import json
+import re
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+INTENT_LOG_FILE = "intent_log.jsonl"
+
+# Below this confidence the utterance is handed to the NAVIGATION_ASSISTANT LLM instead.
+CONFIDENCE_THRESHOLD = 0.75
+
+IntentMatch = namedtuple("IntentMatch", ["command", "confidence", "runner_up"])
+
+# Whole phrases that map to a command. Grow these from intent_log.jsonl entries answered by the LLM.
+COMMAND_PHRASES = {
+    "GOTO_INTERVIEW_SCREEN": [
+        "interview screen", "go to interview", "go to interviews", "open interviews",
+        "mock interview", "mock interviews", "practice session", "practice interview",
+        "i'm ready to give some mock interviews", "let's start a practice session",
+    ],
+    "GOTO_FEEDBACK_SCREEN": [
+        "feedback", "feedback screen", "go to feedback", "show my feedback", "open feedback",
+        "my progress", "show me my progress", "past performance", "my reports", "my results",
+    ],
+    "EXPLAIN_INSTRUCTIONS": [
+        "help", "help me", "instructions", "explain the instructions", "what can i do",
+        "what can i do here", "how does this work", "repeat the instructions",
+    ],
+    "START_BACKGROUND_INTERVIEW": [
+        "background interview", "start background interview", "start a background interview",
+        "let's start a background interview", "begin the background check", "begin background interview",
+    ],
+    "START_SALARY_INTERVIEW": [
+        "salary negotiation", "start salary negotiation", "start the salary negotiation",
+        "salary interview", "negotiate salary", "i'm ready to talk about salary",
+    ],
+}
+
+# Single words that point at a command when no phrase matches. Keywords alone
+# never reach CONFIDENCE_THRESHOLD: they only rank the candidates that are
+# logged, and the utterance still goes to the LLM.
+COMMAND_KEYWORDS = {
+    "GOTO_INTERVIEW_SCREEN": {"interviews": 0.5, "practice": 0.5, "mock": 0.6},
+    "GOTO_FEEDBACK_SCREEN": {"feedback": 0.8, "progress": 0.7, "report": 0.6, "reports": 0.6, "performance": 0.6},
+    "EXPLAIN_INSTRUCTIONS": {"help": 0.8, "instructions": 0.8},
+}
+KEYWORD_SCORE_CAP = CONFIDENCE_THRESHOLD - 0.05
+
+# Commands that start an interview are only resolved locally from a phrase
+# that makes up most of the utterance, so "tell me about my background
+# interview report" doesn't start one. The same goes for help, whose phrases
+# ("help me", "what can i do") open many questions about the interviews.
+START_COMMANDS = {"START_BACKGROUND_INTERVIEW", "START_SALARY_INTERVIEW"}
+PHRASE_ONLY_COMMANDS = START_COMMANDS | {"EXPLAIN_INSTRUCTIONS"}
+# A runner-up START_* command matched this well is named in the utterance, so
+# "open the feedback for my background interview" is left to the LLM.
+NAMED_START_RATIO = 0.8
+
+# "I do not want feedback" names a command without asking for it; the LLM decides those.
+NEGATION_WORDS = {"not", "no", "never", "don't", "dont", "doesn't", "didn't", "won't", "can't", "cannot", "isn't"}
+
+FILLER_WORDS = {"um", "uh", "please", "okay", "ok", "so", "like", "hey", "gemma", "pragati"}
+
+_log_lock = threading.Lock()
+
+
+def normalize(text):
+    """Lowercases, strips punctuation Whisper adds, and drops filler words."""
+    text = re.sub(r"[^a-z0-9' ]+", " ", text.lower())
+    return [word for word in text.split() if word not in FILLER_WORDS]
+
+
+def _window_ratio(words, phrase):
+    """Best fuzzy match of a phrase against any same-length window of the utterance."""
+    if not words:
+        return 0.0
+    window = len(phrase.split())
+    if len(words) <= window:
+        candidates = [words]
+    else:
+        candidates = [words[i:i + window] for i in range(len(words) - window + 1)]
+    return max(difflib.SequenceMatcher(None, " ".join(c), phrase).ratio() for c in candidates)
+
+
+def _phrase_score(words, phrase, strict=False):
+    """
+    _window_ratio weighted by how much of the utterance the phrase covers.
+    With strict=True, a phrase that is only a small part of the utterance scores much lower.
+    """
+    if not words:
+        return 0.0
+    best = _window_ratio(words, phrase)
+    window = len(phrase.split())
+    # A phrase buried in a long utterance is weaker evidence than one that is the whole utterance.
+    coverage = min(1.0, window / len(words))
+    if strict:
+        return best * (0.5 + 0.5 * coverage)
+    return best * (0.8 + 0.2 * coverage)
+
+
+def _keyword_score(words, keywords):
+    return min(KEYWORD_SCORE_CAP, sum(weight for word, weight in keywords.items() if word in words))
+
+
+def route(text):
+    """
+    Resolves an utterance to a navigation command without the LLM.
+    Returns an IntentMatch; callers should only trust it above CONFIDENCE_THRESHOLD.
+    """
+    words = normalize(text)
+    scores = {}
+    for command, phrases in COMMAND_PHRASES.items():
+        strict = command in PHRASE_ONLY_COMMANDS
+        phrase_score = max(_phrase_score(words, phrase, strict) for phrase in phrases)
+        keyword_score = _keyword_score(words, COMMAND_KEYWORDS.get(command, {}))
+        scores[command] = max(phrase_score, keyword_score)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best_command, best_score), (runner_up, runner_up_score) = ranked[0], ranked[1]
+
+    # Two commands scoring almost equally means the utterance is ambiguous.
+    margin_penalty = max(0.0, 0.15 - (best_score - runner_up_score))
+    confidence = max(0.0, best_score - margin_penalty)
+    if NEGATION_WORDS.intersection(words):
+        confidence = 0.0
+    elif runner_up in START_COMMANDS and max(_window_ratio(words, phrase) for phrase in COMMAND_PHRASES[runner_up]) >= NAMED_START_RATIO:
+        confidence = min(confidence, KEYWORD_SCORE_CAP)
+    return IntentMatch(best_command, round(confidence, 3), runner_up)
+
+
+def log_resolution(text, command, match, path, elapsed_ms):
+    """Appends how an utterance was resolved, so the phrase tables can be grown from real usage."""
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "text": text,
+        "command": command,
+        "path": path,
+        "router_command": match.command,
+        "router_confidence": match.confidence,
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
+    print(f"INTENT_ROUTER: '{text}' -> {command} via {path} ({elapsed_ms:.1f} ms, confidence {match.confidence})")
+    try:
+        with _log_lock, open(INTENT_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"INTENT_ROUTER: Could not write intent log: {e}")
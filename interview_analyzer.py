@@ -1,6 +1,9 @@
 import prompts
 from data_models import InterviewDataRow
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
 import uuid
 
 def calculate_vocal_metrics(text, duration):
@@ -27,37 +30,111 @@ def analyze_content_with_gemma(gemma_model, process_func, question, answer):
         print(f"Error during content analysis: {e}")
         return {}
 
-def run_full_analysis(gemma_model, process_func, conversation_history, interview_type):
-    """MODIFIED to pass the model and process_func down."""
+def run_full_analysis(gemma_model, process_func, conversation_history, interview_type, max_workers=1):
+    """
+    MODIFIED to pass the model and process_func down.
+    With max_workers > 1 the answers are scored concurrently, so process_func
+    must be safe to call from several threads (e.g. ContextPool.process).
+    """
     print("\n--- Starting Post-Interview Analysis ---")
     validated_rows = []
     questions = [msg['content'] for msg in conversation_history if msg['role'] == 'assistant']
     answers = [msg['content'] for msg in conversation_history if msg['role'] == 'user']
+    qa_pairs = list(zip(questions, answers))
     
     interview_id = uuid.uuid4()
     timestamp = datetime.now()
 
-    for i, answer_text in enumerate(answers):
-        if i >= len(questions): break
-        
-        question = questions[i]
-        
-        answer_duration = (len(answer_text.split()) / 150) * 60
-
-        vocal_metrics = calculate_vocal_metrics(answer_text, answer_duration)
-        content_analysis = analyze_content_with_gemma(gemma_model, process_func, question, answer_text)
-        
-        full_data = {
-            "interview_id": interview_id, "timestamp": timestamp, "interview_type": interview_type,
-            "question_number": i + 1, "question_text": question, "answer_text": answer_text,
-            "wpm": vocal_metrics['wpm'], **content_analysis
-        }
-        
-        try:
-            validated_row = InterviewDataRow(**full_data)
+    # executor.map yields results in submission order, so analyses[i] always belongs to qa_pairs[i].
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        analyses = list(executor.map(
+            lambda qa: analyze_content_with_gemma(gemma_model, process_func, qa[0], qa[1]),
+            qa_pairs
+        ))
+
+    for i, ((question, answer_text), content_analysis) in enumerate(zip(qa_pairs, analyses)):
+        validated_row = build_validated_row(interview_id, timestamp, interview_type, i + 1, question, answer_text, content_analysis)
+        if validated_row:
             validated_rows.append(validated_row)
-        except Exception as e:
-            print(f"--- Data Validation Error for question {i+1}: {e} ---")
-            continue
             
-    return validated_rows
\ No newline at end of file
+    return validated_rows
+
+def build_validated_row(interview_id, timestamp, interview_type, question_number, question, answer_text, content_analysis):
+    """Combines vocal metrics and content analysis into a validated row, or None if validation fails."""
+    answer_duration = (len(answer_text.split()) / 150) * 60
+
+    vocal_metrics = calculate_vocal_metrics(answer_text, answer_duration)
+    
+    full_data = {
+        "interview_id": interview_id, "timestamp": timestamp, "interview_type": interview_type,
+        "question_number": question_number, "question_text": question, "answer_text": answer_text,
+        "wpm": vocal_metrics['wpm'], **content_analysis
+    }
+    
+    try:
+        return InterviewDataRow(**full_data)
+    except Exception as e:
+        print(f"--- Data Validation Error for question {question_number}: {e} ---")
+        return None
+
+class IncrementalAnalyzer:
+    """
+    Scores each answer in a background thread as soon as it is given, so that
+    only the final answer is left to analyze when the interview ends.
+    If an idle_event is given, a new job only starts while it is set, which
+    keeps scoring out of the way of the interviewer's own LLM turns.
+    With workers > 1 (one per background context in the inference worker's
+    pool), answers that queue up are scored concurrently.
+    """
+
+    def __init__(self, gemma_model, process_func, interview_type, idle_event=None, workers=1):
+        self.gemma_model = gemma_model
+        self.process_func = process_func
+        self.interview_type = interview_type
+        self.idle_event = idle_event
+        self.interview_id = uuid.uuid4()
+        self.timestamp = datetime.now()
+        self.analyses = {}  # question_number -> (question, answer, content_analysis)
+        self.jobs = queue.Queue()
+        self.finishing = False
+        self.workers = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, workers))]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, question_number, question, answer):
+        """Queues one question/answer pair for scoring."""
+        self.jobs.put((question_number, question, answer))
+
+    def _wait_for_idle(self):
+        while self.idle_event is not None and not self.idle_event.is_set() and not self.finishing:
+            self.idle_event.wait(timeout=0.1)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            question_number, question, answer = job
+            self._wait_for_idle()
+            print(f"DEBUG: Background scoring of answer {question_number} started.")
+            analysis = analyze_content_with_gemma(self.gemma_model, self.process_func, question, answer)
+            self.analyses[question_number] = (question, answer, analysis)
+
+    def finish(self):
+        """Scores whatever is still queued, without waiting for idle gaps, and returns the validated rows in order."""
+        self.finishing = True
+        for worker in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+
+        validated_rows = []
+        for question_number in sorted(self.analyses):
+            question, answer, analysis = self.analyses[question_number]
+            validated_row = build_validated_row(
+                self.interview_id, self.timestamp, self.interview_type,
+                question_number, question, answer, analysis
+            )
+            if validated_row:
+                validated_rows.append(validated_row)
+        return validated_rows
\ No newline at end of file
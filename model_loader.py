@@ -0,0 +1,78 @@
+# model_loader.py
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+MODEL_LOAD_LOG = "model_load_timings.jsonl"
+
+
+class ModelLoader:
+    """
+    Loads every model on its own thread as soon as the app starts, so callers
+    only ever wait on the one model they need next. Each load's duration is
+    appended to MODEL_LOAD_LOG to catch start-up regressions.
+    """
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress
+        self.futures = {}
+        self.timings = {}
+        self.labels = {}
+
+    def start(self, name, label, load_func):
+        """Starts loading a model in the background. `label` is the user-facing name."""
+        future = Future()
+        self.futures[name] = future
+        self.labels[name] = label
+        threading.Thread(target=self._load, args=(name, load_func, future), daemon=True).start()
+
+    def _report(self, name, state):
+        if self.on_progress:
+            self.on_progress(name, self.labels[name], state)
+
+    def _load(self, name, load_func, future):
+        self._report(name, "loading")
+        print(f"DEBUG: Loading {self.labels[name]}...")
+        started = time.perf_counter()
+        try:
+            model = load_func()
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            print(f"MODEL_LOADER_ERROR: {self.labels[name]} failed after {elapsed:.1f}s: {e}")
+            self._record(name, elapsed, ok=False)
+            future.set_exception(e)
+            self._report(name, "failed")
+            return
+        elapsed = time.perf_counter() - started
+        print(f"DEBUG: {self.labels[name]} LOADED in {elapsed:.1f}s.")
+        self._record(name, elapsed, ok=True)
+        future.set_result(model)
+        self._report(name, "ready")
+
+    def _record(self, name, seconds, ok):
+        self.timings[name] = seconds
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "model": name,
+            "seconds": round(seconds, 2),
+            "ok": ok,
+        }
+        try:
+            with open(MODEL_LOAD_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"MODEL_LOADER_ERROR: Could not record load timing: {e}")
+
+    def is_ready(self, name):
+        future = self.futures.get(name)
+        return future is not None and future.done() and future.exception() is None
+
+    def wait(self, name, timeout=None):
+        """Blocks until the named model is loaded and returns it, re-raising any load error."""
+        return self.futures[name].result(timeout=timeout)
+
+    def all_done(self):
+        return all(future.done() for future in self.futures.values())
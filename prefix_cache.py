@@ -0,0 +1,114 @@
+# prefix_cache.py
+
+import hashlib
+import os
+import pickle
+import threading
+
+
+class PrefixCache:
+    """
+    Keeps an evaluated KV-cache snapshot for each static prompt prefix
+    (e.g. a persona from AI_PERSONAS) so that only the user-specific
+    suffix of a prompt has to be prefilled by llama.cpp.
+
+    `lock` must be the one lock that serializes every use of `llm`: the cache
+    takes it in register(), and callers hold it from restore() until their
+    completion call on `llm` has finished.
+    """
+
+    def __init__(self, llm, model_path, persist=True, lock=None):
+        self.llm = llm
+        self.model_path = model_path
+        self.persist = persist
+        self.prefixes = {}  # name -> (prefix_text, n_tokens, LlamaState)
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.lock = lock or threading.Lock()
+
+    def _snapshot_path(self, name, prefix_text):
+        """Snapshot files live next to the GGUF and are keyed on the prefix text and model file."""
+        try:
+            model_stat = os.stat(self.model_path)
+            model_key = f"{model_stat.st_size}:{int(model_stat.st_mtime)}"
+        except OSError:
+            model_key = "unknown"
+        digest = hashlib.sha256(f"{model_key}\n{prefix_text}".encode("utf-8")).hexdigest()[:16]
+        return f"{self.model_path}.{name.lower()}.{digest}.prefix"
+
+    def _load_snapshot(self, path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            if os.path.exists(path):
+                print(f"PREFIX_CACHE: Could not read snapshot {path}: {e}")
+            return None
+
+    def _save_snapshot(self, path, state):
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"PREFIX_CACHE: Could not persist snapshot {path}: {e}")
+
+    def register(self, name, prefix_text):
+        """Evaluates (or loads from disk) the KV state for a static prompt prefix."""
+        with self.lock:
+            tokens = self.llm.tokenize(prefix_text.encode("utf-8"), special=True)
+            path = self._snapshot_path(name, prefix_text)
+
+            state = self._load_snapshot(path) if self.persist else None
+            if state is not None and state.n_tokens == len(tokens):
+                print(f"PREFIX_CACHE: Loaded '{name}' snapshot from disk ({len(tokens)} tokens).")
+            else:
+                print(f"PREFIX_CACHE: Evaluating '{name}' prefix ({len(tokens)} tokens)...")
+                self.llm.reset()
+                self.llm.eval(tokens)
+                state = self.llm.save_state()
+                # Generation always re-evaluates the last prompt token, so only the
+                # final logits row is ever read back. Dropping the rest keeps each
+                # snapshot down to roughly the size of its KV cells.
+                state.scores = state.scores[-1:, :].copy()
+                if self.persist:
+                    self._save_snapshot(path, state)
+
+            self.prefixes[name] = (prefix_text, len(tokens), state)
+
+    def restore(self, prompt):
+        """
+        Restores the snapshot of the longest registered prefix of `prompt`.
+        Must be called while holding `self.lock` (the lock guarding `llm`), right
+        before the completion call and without releasing it in between, so
+        llama.cpp's own prefix matching only evaluates the remaining suffix.
+        Returns the name of the prefix used, or None on a miss.
+        """
+        best_name, best_len = None, 0
+        for name, (prefix_text, _, _) in self.prefixes.items():
+            if len(prefix_text) > best_len and prompt.startswith(prefix_text):
+                best_name, best_len = name, len(prefix_text)
+
+        if best_name is None:
+            self.misses += 1
+            return None
+
+        _, n_tokens, state = self.prefixes[best_name]
+        current = list(self.llm.input_ids[:min(self.llm.n_tokens, n_tokens)])
+        if len(current) < n_tokens or current != list(state.input_ids[:n_tokens]):
+            self.llm.load_state(state)
+
+        self.hits += 1
+        self.tokens_saved += n_tokens
+        return best_name
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "tokens_saved": self.tokens_saved,
+        }
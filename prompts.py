@@ -176,4 +176,19 @@ RULES:
 - If the user is disagreeing, denying, or saying no, respond with the single word: NO
 - If the user's response is unclear or something else, respond with the single word: UNKNOWN
 User's response: "{user_response}"
-"""
\ No newline at end of file
+"""
+
+HISTORY_SUMMARY_PROMPT = """
+You are a note-taking assistant for a job interview. Update the running summary of the conversation with the new exchanges below.
+
+RULES:
+- Keep every concrete fact the candidate shared (projects, skills, numbers, offers, decisions).
+- Note which topics the interviewer has already asked about, so they are not repeated.
+- Respond with ONLY the updated summary as plain text, under 120 words.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW EXCHANGES:
+{new_messages}
+"""
@@ -0,0 +1,59 @@
+# response_cache.py
+
+import hashlib
+import json
+import os
+
+from db_connection import DB_FILE
+from two_tier_cache import TwoTierCache
+
+MEMORY_ENTRIES = 256
+MAX_DISK_BYTES = 20 * 1024 * 1024
+
+
+def model_fingerprint(model_path, sample_bytes=1024 * 1024):
+    """
+    Hashes the model's size together with its first and last MiB. Reading a
+    whole multi-GB GGUF on every start-up would cost more than the cache saves,
+    and the header alone already differs between quantizations.
+    """
+    digest = hashlib.sha256()
+    try:
+        size = os.path.getsize(model_path)
+        digest.update(str(size).encode("utf-8"))
+        with open(model_path, "rb") as f:
+            digest.update(f.read(sample_bytes))
+            if size > sample_bytes:
+                f.seek(max(sample_bytes, size - sample_bytes))
+                digest.update(f.read(sample_bytes))
+    except OSError as e:
+        print(f"RESPONSE_CACHE: Could not fingerprint model file: {e}")
+        digest.update(model_path.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache(TwoTierCache):
+    """
+    Content-addressed cache of LLM completions, keyed on the model file,
+    prompt, max_tokens, stop list and sampling parameters. A small in-memory
+    LRU sits in front of an SQLite table in profiles.db, which is trimmed to
+    MAX_DISK_BYTES by least-recent use.
+    """
+
+    table = "llm_response_cache"
+    value_column = "response"
+    name = "response cache"
+
+    def __init__(self, model_path, db_file=DB_FILE, memory_entries=MEMORY_ENTRIES, max_disk_bytes=MAX_DISK_BYTES):
+        super().__init__(db_file, memory_entries, max_disk_bytes)
+        self.model_hash = model_fingerprint(model_path)
+
+    def make_key(self, prompt, max_tokens, stop, sampling):
+        payload = json.dumps({
+            "model": self.model_hash,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "stop": list(stop),
+            "sampling": sampling,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
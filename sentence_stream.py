@@ -0,0 +1,55 @@
+# sentence_stream.py
+
+import re
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets) and whitespace.
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\')\]]*\s+')
+CODE_FENCE = re.compile(r'```[A-Za-z]*\n?')
+ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "e.g.", "i.e.", "etc.", "vs.", "st."}
+
+
+class SentenceSegmenter:
+    """
+    Turns a stream of LLM token pieces into complete, speakable sentences.
+    Code fences are dropped as they arrive, and sentences shorter than
+    `min_chars` are merged into the next one so TTS isn't fed fragments.
+    """
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def _clean(self, final=False):
+        # Hold back a trailing run of backticks until we know whether it's a fence.
+        held = ""
+        if not final:
+            match = re.search(r'`+[A-Za-z]*$', self.buffer)
+            if match:
+                held = self.buffer[match.start():]
+                self.buffer = self.buffer[:match.start()]
+        self.buffer = CODE_FENCE.sub("", self.buffer) + held
+
+    def feed(self, text):
+        """Adds a token piece and returns any sentences it completed."""
+        self.buffer += text
+        self._clean()
+
+        sentences = []
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in ABBREVIATIONS:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Returns whatever is left once the stream has finished."""
+        self._clean(final=True)
+        remainder = self.buffer.replace("`", "").strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
@@ -0,0 +1,174 @@
+# spoken_parsing.py
+
+import re
+from datetime import datetime, timedelta
+
+UNKNOWN = "UNKNOWN"
+
+ORDINAL_WORDS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+    "eleventh": 11, "twelfth": 12,
+}
+CARDINAL_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+DAY_WORDS = {
+    **ORDINAL_WORDS, "thirteenth": 13, "fourteenth": 14, "fifteenth": 15, "sixteenth": 16,
+    "seventeenth": 17, "eighteenth": 18, "nineteenth": 19, "twentieth": 20, "thirtieth": 30,
+}
+
+YES_WORDS = {"yes", "yeah", "yep", "yup", "sure", "correct", "right", "exactly", "absolutely", "affirmative", "okay", "ok", "perfect"}
+YES_PHRASES = ["that's it", "that is it", "go ahead", "sounds good", "that's the one", "that one"]
+NO_WORDS = {"no", "nope", "nah", "wrong", "incorrect", "negative", "not"}
+NO_PHRASES = ["not that", "that's wrong", "different one", "another one", "try again"]
+
+EXIT_PHRASES = [
+    "that's all", "that is all", "i'm done", "i am done", "i'm finished", "i am finished",
+    "end session", "end the session", "stop the session", "no more questions", "nothing else",
+    "goodbye", "good bye", "let's stop", "we can stop", "that will be all",
+]
+# "How can I quit using filler words?" is not a goodbye; these only count as the whole utterance.
+EXIT_WORDS = {"bye", "exit", "quit"}
+EXIT_COURTESY_WORDS = {"ok", "okay", "thanks", "thank", "you", "please", "then"}
+QUESTION_STARTS = (
+    "what", "why", "how", "when", "where", "which", "who", "can you", "could you",
+    "would you", "tell me", "explain", "should i", "is my", "was my", "did i", "do i",
+)
+
+
+def _normalize(text):
+    text = text.lower().replace("’", "'")
+    return re.sub(r"[^a-z0-9' ]+", " ", text).split()
+
+
+def _contains_phrase(words, phrase):
+    return f" {phrase} " in f" {' '.join(words)} "
+
+
+def _day_from_token(token):
+    match = re.fullmatch(r"(\d{1,2})(st|nd|rd|th)?", token)
+    if match:
+        return int(match.group(1))
+    return DAY_WORDS.get(token)
+
+
+def parse_spoken_date(text, today=None):
+    """Returns the calendar date mentioned in text ("March 3rd", "3rd of March", "yesterday"), or None."""
+    words = _normalize(text)
+    today = today or datetime.now()
+    if "today" in words:
+        return today.date()
+    if "yesterday" in words:
+        return (today - timedelta(days=1)).date()
+
+    for i, word in enumerate(words):
+        if word not in MONTHS:
+            continue
+        # "march 3rd" / "march the third" / "3rd of march" / "the third of march"
+        neighbours = words[i + 1:i + 3] + list(reversed(words[max(0, i - 3):i]))
+        for token in neighbours:
+            day = _day_from_token(token)
+            if day and 1 <= day <= 31:
+                try:
+                    return today.replace(month=MONTHS[word], day=day).date()
+                except ValueError:
+                    return None
+    return None
+
+
+def parse_ordinal(text, list_length, dates=None):
+    """
+    Converts a spoken selection ("the second one", "number 3", "the last one",
+    "the latest", "the one from March 3rd") into a zero-based index.
+    `dates` are the datetimes of the listed items and enable date and
+    latest/oldest lookups. Returns UNKNOWN when the selection can't be
+    determined with confidence.
+    """
+    words = _normalize(text)
+    if not words or list_length <= 0:
+        return UNKNOWN
+
+    if dates:
+        spoken_date = parse_spoken_date(text)
+        if spoken_date:
+            matches = [i for i, d in enumerate(dates) if d.date() == spoken_date]
+            return matches[0] if len(matches) == 1 else UNKNOWN
+        if any(w in words for w in ("latest", "newest", "recent")):
+            return max(range(len(dates)), key=lambda i: dates[i])
+        if any(w in words for w in ("oldest", "earliest")):
+            return min(range(len(dates)), key=lambda i: dates[i])
+
+    if "penultimate" in words or _contains_phrase(words, "second last") or _contains_phrase(words, "second to last"):
+        return list_length - 2
+    if any(w in words for w in ("last", "latest", "final", "recent")):
+        return list_length - 1
+
+    ordinals = {ORDINAL_WORDS[w] for w in words if w in ORDINAL_WORDS}
+    ordinals |= {int(m.group(1)) for w in words for m in [re.fullmatch(r"(\d+)(st|nd|rd|th)", w)] if m}
+    if len(ordinals) == 1:
+        return ordinals.pop() - 1
+    if ordinals:
+        return UNKNOWN
+
+    # "the one", "that one" name an item rather than count it.
+    cardinals = set()
+    for i, word in enumerate(words):
+        if word == "one" and i > 0 and words[i - 1] in ("the", "that", "this", "which"):
+            continue
+        if word in CARDINAL_WORDS:
+            cardinals.add(CARDINAL_WORDS[word])
+        elif word.isdigit():
+            cardinals.add(int(word))
+    if len(cardinals) == 1:
+        return cardinals.pop() - 1
+    return UNKNOWN
+
+
+def parse_yes_no(text):
+    """Classifies a confirmation as YES, NO or UNKNOWN (same labels as CONFIRMATION_PROMPT)."""
+    words = _normalize(text)
+    says_yes = any(w in YES_WORDS for w in words) or any(_contains_phrase(words, p) for p in YES_PHRASES)
+    says_no = any(w in NO_WORDS for w in words) or any(_contains_phrase(words, p) for p in NO_PHRASES)
+    if says_no and any(_contains_phrase(words, p) for p in NO_PHRASES):
+        return "NO"
+    if says_yes and not says_no:
+        return "YES"
+    if says_no and not says_yes:
+        return "NO"
+    return UNKNOWN
+
+
+def _starts_with_question(words):
+    return any(words[:len(start.split())] == start.split() for start in QUESTION_STARTS)
+
+
+def detect_exit(text):
+    """
+    Classifies a feedback-session utterance as YES_EXIT, NO_EXIT or UNKNOWN (same labels as EXIT_DETECTOR).
+    YES_EXIT needs the goodbye to be most of the utterance; "nothing else, but can you tell me
+    about salary ranges" is left UNKNOWN for EXIT_DETECTOR.
+    """
+    words = _normalize(text)
+    if not words:
+        return UNKNOWN
+    if text.strip().endswith("?") or _starts_with_question(words):
+        return "NO_EXIT"
+    rest = f" {' '.join(words)} "
+    for phrase in sorted(EXIT_PHRASES, key=len, reverse=True):
+        rest = rest.replace(f" {phrase} ", " ")
+    remaining = [w for w in rest.split() if w not in EXIT_COURTESY_WORDS]
+    other_words = [w for w in remaining if w not in EXIT_WORDS]
+    phrase_words = len(words) - len(rest.split())
+    if phrase_words:
+        exit_words = phrase_words + len(remaining) - len(other_words)
+        return "YES_EXIT" if exit_words > len(other_words) else UNKNOWN
+    # Bare exit/quit/bye only count as the whole utterance.
+    if remaining and not other_words:
+        return "YES_EXIT"
+    return UNKNOWN
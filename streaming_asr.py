@@ -0,0 +1,124 @@
+# streaming_asr.py
+
+import re
+import threading
+
+import numpy as np
+
+from asr_audio import WHISPER_SAMPLE_RATE
+
+# Words of already-committed text passed to Whisper as context for the next window.
+PROMPT_TAIL_WORDS = 30
+# After a failed window, wait this long before trying again; the audio stays
+# uncommitted, so finish() still transcribes it if every retry fails.
+ERROR_BACKOFF_S = 1.0
+
+
+def _norm(word):
+    return re.sub(r"[^a-z0-9']", "", word.lower())
+
+
+def stitch_transcripts(previous, new, max_overlap_words=12):
+    """
+    Appends `new` to `previous`, dropping the words they share because the
+    two windows overlapped in time. Looks for the longest run of words that
+    ends `previous` and starts (or appears early in) `new`.
+    """
+    prev_words, new_words = previous.split(), new.split()
+    if not prev_words:
+        return new.strip()
+    if not new_words:
+        return previous.strip()
+
+    prev_norm = [_norm(w) for w in prev_words]
+    new_norm = [_norm(w) for w in new_words]
+
+    # Whisper sometimes drops or adds a word at the window edge, so allow the
+    # overlap to start a few words into the new window.
+    best_cut = 0
+    for k in range(min(max_overlap_words, len(prev_norm), len(new_norm)), 1, -1):
+        tail = prev_norm[-k:]
+        for offset in range(0, min(4, len(new_norm) - k + 1)):
+            if new_norm[offset:offset + k] == tail:
+                best_cut = offset + k
+                break
+        if best_cut:
+            break
+    return " ".join(prev_words + new_words[best_cut:])
+
+
+class StreamingTranscriber:
+    """
+    Transcribes a long answer while it is still being spoken. Audio is fed in
+    as 16 kHz float32 chunks; every `window_seconds` a background thread
+    transcribes the newest window (plus `overlap_seconds` of the previous one)
+    and stitches it onto the running text, so when the speaker stops only the
+    last short stretch is left to transcribe.
+
+    `transcribe_func(audio, prompt)` must return the text for a float32 array,
+    using `prompt` as preceding context.
+    """
+
+    def __init__(self, transcribe_func, window_seconds=8.0, overlap_seconds=1.5, on_partial=None):
+        self.transcribe_func = transcribe_func
+        self.window_samples = int(window_seconds * WHISPER_SAMPLE_RATE)
+        self.overlap_samples = int(overlap_seconds * WHISPER_SAMPLE_RATE)
+        self.on_partial = on_partial
+        self.chunks = []
+        self.total_samples = 0
+        self.committed_samples = 0  # audio up to here is reflected in self.text
+        self.text = ""
+        self.condition = threading.Condition()
+        self.finished = False
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def feed(self, samples):
+        with self.condition:
+            self.chunks.append(samples)
+            self.total_samples += len(samples)
+            if self.total_samples - self.committed_samples >= self.window_samples:
+                self.condition.notify()
+
+    def _audio(self, start, end):
+        audio = np.concatenate(self.chunks) if len(self.chunks) > 1 else self.chunks[0]
+        self.chunks = [audio]
+        return audio[start:end]
+
+    def _transcribe_window(self, end):
+        start = max(0, self.committed_samples - self.overlap_samples)
+        with self.condition:
+            window = self._audio(start, end)
+        prompt = " ".join(self.text.split()[-PROMPT_TAIL_WORDS:])
+        try:
+            window_text = self.transcribe_func(window, prompt)
+        except Exception as e:
+            print(f"Streaming transcription error: {e}")
+            return False
+        self.text = stitch_transcripts(self.text, window_text)
+        self.committed_samples = end
+        if self.on_partial and self.text:
+            self.on_partial(self.text)
+        return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.finished and self.total_samples - self.committed_samples < self.window_samples:
+                    self.condition.wait()
+                if self.finished:
+                    return
+                end = self.total_samples
+            if not self._transcribe_window(end):
+                with self.condition:
+                    self.condition.wait_for(lambda: self.finished, timeout=ERROR_BACKOFF_S)
+
+    def finish(self):
+        """Stops windowed transcription, transcribes what's left and returns the full text."""
+        with self.condition:
+            self.finished = True
+            self.condition.notify()
+        self.worker.join()
+        if self.total_samples > self.committed_samples:
+            self._transcribe_window(self.total_samples)
+        return self.text.strip()
@@ -0,0 +1,83 @@
+# tts_cache.py
+
+import hashlib
+import json
+import sqlite3
+
+import numpy as np
+
+from db_connection import get_connection
+from response_cache import model_fingerprint
+from two_tier_cache import TwoTierCache
+
+TTS_CACHE_DB = "tts_cache.db"
+MEMORY_ENTRIES = 64
+MAX_DISK_BYTES = 64 * 1024 * 1024
+
+
+class TtsCache(TwoTierCache):
+    """
+    Rendered Piper audio for phrases that are spoken again and again, keyed on
+    the voice model, the whitespace-normalised text and the synthesis config.
+    Raw int16 PCM is kept in its own SQLite file (so profiles.db stays small)
+    behind a small in-memory LRU, and trimmed to MAX_DISK_BYTES by least-recent use.
+    """
+
+    table = "tts_cache"
+    value_column = "pcm"
+    name = "TTS cache"
+
+    def __init__(self, voice_model_path, db_file=TTS_CACHE_DB, memory_entries=MEMORY_ENTRIES, max_disk_bytes=MAX_DISK_BYTES):
+        super().__init__(db_file, memory_entries, max_disk_bytes)
+        self.voice_hash = model_fingerprint(voice_model_path)
+        self._create_table()
+
+    def _create_table(self):
+        try:
+            conn = get_connection(self.db_file)
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS tts_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        text TEXT NOT NULL,
+                        pcm BLOB NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """)
+        except sqlite3.Error as e:
+            print(f"Database error creating TTS cache: {e}")
+
+    def make_key(self, text, synthesis_config=None):
+        payload = json.dumps({
+            "voice": self.voice_hash,
+            "text": " ".join(text.split()),
+            "config": synthesis_config or {},
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _encode(self, samples):
+        return np.ascontiguousarray(samples, dtype=np.int16).tobytes()
+
+    def _decode(self, pcm):
+        return np.frombuffer(pcm, dtype=np.int16)
+
+    def get(self, text, synthesis_config=None):
+        """Returns the cached int16 samples for a phrase, or None."""
+        return super().get(self.make_key(text, synthesis_config))
+
+    def put(self, text, samples, synthesis_config=None):
+        """Stores a rendered phrase and evicts the least recently used entries over budget."""
+        super().put(self.make_key(text, synthesis_config), samples, text=text)
+
+    def warm_up(self, phrases, synthesize, synthesis_config=None):
+        """
+        Renders every phrase that isn't cached yet with `synthesize(text) -> int16 samples`.
+        Returns how many phrases were rendered.
+        """
+        rendered = 0
+        for phrase in phrases:
+            if self.get(phrase, synthesis_config) is None:
+                self.put(phrase, synthesize(phrase), synthesis_config)
+                rendered += 1
+        return rendered
@@ -0,0 +1,34 @@
+# tts_config.py
+"""
+Piper voice and TTS cache settings, shared by app.py and warm_tts_cache.py
+(which only needs these and shouldn't have to import the app to get them).
+"""
+
+from resources import resource_path
+
+PIPER_MODEL_PATH = resource_path("./model/en_US-hfc_female-medium.onnx")
+
+WAKE_WORD_HINT = "Say Pragati, followed by a command, whenever you need me."
+
+# Phrases up to this length spoken through speak() are cached as rendered PCM
+# in tts_cache.db; longer text is almost always a one-off LLM reply.
+TTS_CACHE_ENABLED = True
+TTS_CACHE_MAX_CHARS = 160
+# Fixed phrases pre-rendered by warm_tts_cache.py, so even their first use is instant.
+TTS_WARMUP_PHRASES = [
+    "A required audio file could not be found.",
+    "I'm sorry, I didn't catch that. Please say which report you'd like.",
+    "My mistake. Let's try again.",
+    "I don't see a report with that number. Please try again.",
+    "I didn't understand that selection. Please say, for example, 'the first one' or 'the last one'.",
+    "I'm sorry, I couldn't retrieve the details for that report.",
+    "I'm sorry, I didn't catch that. Could you ask your question again?",
+    "Okay, let's begin the Background interview.",
+    "Okay, let's begin the Salary Negotiation interview.",
+    "It seems we've reached a good stopping point. Thank you for your time.",
+    "Okay, that seems like a good place to stop. Thank you.",
+    "We've covered a lot today, so let's wrap up there. Thank you.",
+    "There was an issue generating the analysis, so no report was saved.",
+    "Of course. Here are the instructions again.",
+    WAKE_WORD_HINT,
+]
@@ -0,0 +1,100 @@
+# tts_pipeline.py
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from sentence_stream import SentenceSegmenter
+
+
+def split_sentences(text):
+    """Splits a whole reply into the sentences the pipeline synthesizes one at a time."""
+    segmenter = SentenceSegmenter()
+    return segmenter.feed(text) + segmenter.flush()
+
+
+class SpeechPipeline:
+    """
+    Double-buffered TTS: a synthesis worker renders sentences into a bounded
+    queue while the caller's thread hands them to the mixer, so the next
+    sentence is synthesized while the current one plays. The worker stays at
+    most `lookahead` sentences ahead of the one queued behind the playing one,
+    which keeps the work thrown away on an interruption small.
+
+    `synthesize(text)` yields int16 chunks; `play(samples)` queues them and
+    returns a Future for the end of playback.
+    """
+
+    def __init__(self, synthesize, play, sample_rate, lookahead=1):
+        self.synthesize = synthesize
+        self.play = play
+        self.sample_rate = sample_rate
+        self.lookahead = lookahead
+        self.real_time_factors = []
+
+    def _produce(self, sentences, rendered, finished, stop):
+        try:
+            for index, sentence in enumerate(sentences, 1):
+                if stop.is_set():
+                    return
+                started = time.perf_counter()
+                chunks = list(self.synthesize(sentence))
+                if not chunks:
+                    continue
+                samples = np.concatenate(chunks)
+                elapsed = time.perf_counter() - started
+                audio_seconds = len(samples) / self.sample_rate
+                rtf = elapsed / audio_seconds if audio_seconds else 0.0
+                self.real_time_factors.append(rtf)
+                warning = " - synthesis is falling behind playback" if rtf > 1.0 else ""
+                print(f"TTS_PIPELINE: Sentence {index}: {elapsed:.2f}s to synthesize {audio_seconds:.2f}s of audio (RTF {rtf:.2f}){warning}")
+                while not stop.is_set():
+                    try:
+                        rendered.put(samples, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            print(f"TTS_PIPELINE_ERROR: Synthesis failed: {e}")
+        finally:
+            finished.set()
+
+    def run(self, sentences, stop=None):
+        """
+        Speaks an iterable of sentences (it may still be growing, e.g. fed from
+        an LLM stream) and blocks until playback ends or `stop` is set. Returns
+        the rendered sample arrays in order.
+        """
+        stop = stop or threading.Event()
+        halt = threading.Event()  # set when we're done or stopped; the worker only watches this
+        rendered = queue.Queue(maxsize=self.lookahead)
+        finished = threading.Event()
+        worker = threading.Thread(target=self._produce, args=(sentences, rendered, finished, halt), daemon=True)
+        worker.start()
+
+        played = []
+        previous = None
+        while not stop.is_set():
+            try:
+                samples = rendered.get(timeout=0.1)
+            except queue.Empty:
+                if finished.is_set() and rendered.empty():
+                    break
+                continue
+            future = self.play(samples)
+            played.append(samples)
+            # Keep exactly one sentence queued behind the one that is playing.
+            if previous is not None:
+                previous.result()
+            previous = future
+
+        if previous is not None and not stop.is_set():
+            previous.result()
+        halt.set()
+        if not stop.is_set():
+            # When stopped, the worker may still be blocked on a live sentence
+            # source; it exits by itself once that yields.
+            worker.join()
+        return played
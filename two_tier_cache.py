@@ -0,0 +1,105 @@
+# two_tier_cache.py
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from db_connection import get_connection
+
+
+class TwoTierCache:
+    """
+    A small in-memory LRU in front of an SQLite table, which is trimmed to
+    max_disk_bytes by least-recent use. Subclasses name the table and its
+    value column, and override _encode/_decode if the stored form differs
+    from the value handed out. The table needs cache_key, the value column,
+    size_bytes and last_used; put() can fill any other columns it has.
+    """
+
+    table = None
+    value_column = None
+    name = "cache"
+
+    def __init__(self, db_file, memory_entries, max_disk_bytes):
+        self.db_file = db_file
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, stored):
+        return stored
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns the cached value for a key, or None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+
+        try:
+            conn = get_connection(self.db_file)
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {self.value_column} FROM {self.table} WHERE cache_key = ?", (key,))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute(f"UPDATE {self.table} SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Database error reading {self.name}: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        value = self._decode(row[0])
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value, **columns):
+        """Stores a value in both tiers and evicts the least recently used disk entries over budget."""
+        self._remember(key, value)
+        stored = self._encode(value)
+        size_bytes = len(stored.encode("utf-8")) if isinstance(stored, str) else len(stored)
+        names = ["cache_key", self.value_column, *columns, "size_bytes", "last_used"]
+        values = [key, stored, *columns.values(), size_bytes, time.time()]
+        try:
+            conn = get_connection(self.db_file)
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                    values
+                )
+                cursor.execute(f"SELECT COALESCE(SUM(size_bytes), 0) FROM {self.table}")
+                overflow = cursor.fetchone()[0] - self.max_disk_bytes
+                if overflow > 0:
+                    cursor.execute(f"SELECT cache_key, size_bytes FROM {self.table} ORDER BY last_used ASC")
+                    evicted = []
+                    for cache_key, size_bytes in cursor.fetchall():
+                        if overflow <= 0:
+                            break
+                        evicted.append((cache_key,))
+                        overflow -= size_bytes
+                    cursor.executemany(f"DELETE FROM {self.table} WHERE cache_key = ?", evicted)
+        except sqlite3.Error as e:
+            print(f"Database error writing {self.name}: {e}")
+
+    def stats(self):
+        return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses}
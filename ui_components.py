@@ -15,6 +15,9 @@ class WelcomeFrame(ctk.CTkFrame):
         self.buttons_frame = ctk.CTkFrame(self, fg_color="transparent")
         self.buttons_frame.grid(row=1, column=0, sticky="ew")
         self.buttons_frame.grid_columnconfigure(0, weight=1)
+
+        self.load_status_label = ctk.CTkLabel(self, text="", font=("Roboto", 14), justify="center")
+        self.load_status_label.grid(row=2, column=0, pady=(30, 10), padx=20)
         
         self.populate_profile_buttons()
 
@@ -0,0 +1,278 @@
+# wake_word.py
+
+import os
+import re
+import time
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+from asr_audio import WHISPER_SAMPLE_RATE, load_wav, resample
+
+WAKE_PHRASES = ["Pragati", "Hey Pragati", "Okay Pragati"]
+# Mean per-frame cosine distance along the best alignment; lower is a closer match.
+# This is only the ceiling: calibrate() lowers it to just under the closest any
+# non-wake clip comes to a template.
+WAKE_THRESHOLD = 0.15
+CALIBRATION_MARGIN = 0.8
+# Said in the same voice as the templates at build time, as clips the gate must reject.
+NEGATIVE_PHRASES = [
+    "Open my feedback", "Start a background interview", "What can I do here", "Go to interviews",
+    "Practice", "Progress", "Project", "Pretty good", "Grandpa", "Pagoda", "Paragraph", "Hey Priya",
+]
+NEGATIVE_DIR = "negative"
+
+# Strips a spoken wake phrase (and Whisper's usual spellings of it) off a transcript.
+WAKE_PREFIX_RE = re.compile(r"^\s*(?:(?:hey|hi|okay|ok)[,\s]+)?pra+g[a-z]*[\s,.!?-]*", re.IGNORECASE)
+
+WakeMatch = namedtuple("WakeMatch", ["detected", "score", "end_seconds"])
+
+N_FFT = 512
+N_MELS = 26
+N_CEPS = 13
+WIN_MS = 25
+HOP_MS = 10
+# Frames on each side used for the delta (slope) features.
+DELTA_WIDTH = 2
+
+_filterbank_cache = {}
+
+
+def _mel_filterbank(sample_rate):
+    if sample_rate in _filterbank_cache:
+        return _filterbank_cache[sample_rate]
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+    mel_points = np.linspace(hz_to_mel(80.0), hz_to_mel(sample_rate / 2 * 0.9), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    bank = np.zeros((N_FFT // 2 + 1, N_MELS), dtype=np.float32)
+    for m in range(1, N_MELS + 1):
+        left, centre, right = bins[m - 1], bins[m], bins[m + 1]
+        if centre > left:
+            bank[left:centre, m - 1] = (np.arange(left, centre) - left) / (centre - left)
+        if right > centre:
+            bank[centre:right, m - 1] = (right - np.arange(centre, right)) / (right - centre)
+    _filterbank_cache[sample_rate] = bank
+    return bank
+
+
+def _dct_matrix():
+    n = np.arange(N_MELS)
+    k = np.arange(1, N_CEPS)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * N_MELS)).astype(np.float32)
+
+
+_DCT = _dct_matrix()
+
+
+def mfcc(audio, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Cheap MFCCs (c1..c12, no energy term, so loudness doesn't matter) plus a
+    per-frame log energy used for trimming. Returns (features, log_energy).
+    """
+    win = sample_rate * WIN_MS // 1000
+    hop = sample_rate * HOP_MS // 1000
+    if len(audio) < win:
+        audio = np.pad(audio, (0, win - len(audio)))
+    count = 1 + (len(audio) - win) // hop
+    index = np.arange(win)[None, :] + hop * np.arange(count)[:, None]
+    frames = audio[index] * np.hanning(win).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, n=N_FFT)) ** 2
+    log_mel = np.log(power @ _mel_filterbank(sample_rate) + 1e-10)
+    features = log_mel @ _DCT.T
+    log_energy = np.log(np.sum(power, axis=1) + 1e-10)
+    return features.astype(np.float32), log_energy
+
+
+def _normalise(features):
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-6)
+
+
+def _deltas(features):
+    """Regression slope of each coefficient over +-DELTA_WIDTH frames."""
+    n = len(features)
+    padded = np.pad(features, ((DELTA_WIDTH, DELTA_WIDTH), (0, 0)), mode="edge")
+    weights = np.arange(1, DELTA_WIDTH + 1)
+    delta = sum(w * (padded[DELTA_WIDTH + w:DELTA_WIDTH + w + n] - padded[DELTA_WIDTH - w:DELTA_WIDTH - w + n]) for w in weights)
+    return delta / (2.0 * np.sum(weights ** 2))
+
+
+def matching_features(features, log_energy, drop=6.0):
+    """
+    Cepstral mean normalisation over the voiced frames, then the statics and
+    their deltas scaled to unit length per frame. Without the mean removed every
+    voice shares the same spectral tilt, and any two vowels look alike.
+    """
+    voiced = log_energy > log_energy.max() - drop
+    features = features - features[voiced].mean(axis=0)
+    return _normalise(np.hstack((features, 2.0 * _deltas(features)))).astype(np.float32)
+
+
+def _trim_silence(features, log_energy, drop=6.0):
+    """Keeps the frames between the first and last one within `drop` nats of the loudest."""
+    voiced = np.nonzero(log_energy > log_energy.max() - drop)[0]
+    if voiced.size == 0:
+        return features, log_energy
+    return features[voiced[0]:voiced[-1] + 1], log_energy[voiced[0]:voiced[-1] + 1]
+
+
+def subsequence_dtw(template, utterance):
+    """
+    Aligns the whole template against the best-matching stretch of the
+    utterance (free start and end) and returns (mean cost, end frame). Steps
+    (1,1), (1,2) and (2,1) bound the slope to 0.5-2x, which also lets every
+    template row be computed as one vector operation.
+    """
+    cost = 1.0 - template @ utterance.T
+    n, m = cost.shape
+    inf = np.float32(np.inf)
+    prev2 = np.full(m, inf, dtype=np.float32)
+    prev = cost[0].copy()
+    for i in range(1, n):
+        diag = np.concatenate(([inf], prev[:-1]))
+        skip_u = np.concatenate(([inf, inf], prev[:-2]))
+        skip_t = np.concatenate(([inf], prev2[:-1]))
+        current = cost[i] + np.minimum(np.minimum(diag, skip_u), skip_t)
+        prev2, prev = prev, current
+    end = int(np.argmin(prev))
+    return float(prev[end]) / n, end
+
+
+def _load_clips(folder):
+    clips = []
+    if folder and os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(".wav"):
+                try:
+                    clips.append(load_wav(os.path.join(folder, name)))
+                except (OSError, ValueError, wave.Error) as e:
+                    print(f"WAKE_WORD_ERROR: Skipping clip {name}: {e}")
+    return clips
+
+
+def _synthesize_clips(synthesize, phrases):
+    clips = []
+    for phrase in phrases:
+        try:
+            samples, rate = synthesize(phrase)
+            clips.append(resample(samples.astype(np.float32) / 32768.0, rate))
+        except Exception as e:
+            print(f"WAKE_WORD_ERROR: Could not synthesize '{phrase}': {e}")
+    return clips
+
+
+class WakeWordSpotter:
+    """
+    A keyword spotter for the background command listener. Each template is
+    a trimmed, mean-normalised MFCC + delta sequence of someone saying a wake
+    phrase; an utterance passes when some template aligns with its opening
+    seconds more closely than the threshold, which calibrate() sets from clips
+    that must be rejected.
+    """
+
+    def __init__(self, clips, threshold=WAKE_THRESHOLD, search_seconds=2.5):
+        self.templates = []
+        for clip in clips:
+            if len(clip):
+                features, log_energy = _trim_silence(*mfcc(clip))
+                if len(features) > 5:
+                    self.templates.append(matching_features(features, log_energy))
+        self.threshold = threshold
+        self.search_frames = int(search_seconds * 1000 / HOP_MS)
+        self.checked = 0
+        self.accepted = 0
+
+    @classmethod
+    def from_sources(cls, enroll_dir=None, synthesize=None, phrases=WAKE_PHRASES, negative_phrases=NEGATIVE_PHRASES, **kwargs):
+        """
+        Builds templates from the 16-bit WAV recordings in `enroll_dir`, if any,
+        and from `synthesize(text) -> (int16 samples, sample_rate)` for each
+        phrase, then calibrates against the recordings in `enroll_dir`/negative
+        and the synthesized negative phrases. Returns None when there is no template.
+        """
+        clips = _load_clips(enroll_dir)
+        negatives = _load_clips(enroll_dir and os.path.join(enroll_dir, NEGATIVE_DIR))
+        if synthesize:
+            clips += _synthesize_clips(synthesize, phrases)
+            negatives += _synthesize_clips(synthesize, negative_phrases)
+        spotter = cls(clips, **kwargs)
+        if not spotter.templates:
+            return None
+        spotter.calibrate(negatives)
+        print(f"WAKE_WORD: {len(spotter.templates)} templates ready (threshold {spotter.threshold:.3f}).")
+        return spotter
+
+    def calibrate(self, negatives):
+        """Lowers the threshold to CALIBRATION_MARGIN of the closest score any negative clip gets."""
+        scores = [self.score(clip)[0] for clip in negatives if len(clip)]
+        if scores:
+            self.threshold = min(self.threshold, CALIBRATION_MARGIN * min(scores))
+        return scores
+
+    def score(self, audio):
+        """Returns (best mean alignment cost, end frame) of `audio` against the templates."""
+        features, log_energy = mfcc(audio)
+        features, log_energy = features[:self.search_frames], log_energy[:self.search_frames]
+        features = matching_features(features, log_energy)
+        best_score, best_end = np.inf, 0
+        for template in self.templates:
+            if len(features) < len(template) // 2:
+                continue
+            score, end = subsequence_dtw(template, features)
+            if score < best_score:
+                best_score, best_end = score, end
+        return best_score, best_end
+
+    def detect(self, audio):
+        """Checks whether `audio` (16 kHz float32) opens with a wake phrase."""
+        self.checked += 1
+        best_score, best_end = self.score(audio)
+        detected = best_score <= self.threshold
+        if detected:
+            self.accepted += 1
+        return WakeMatch(detected, best_score, (best_end + 1) * HOP_MS / 1000 + WIN_MS / 1000)
+
+
+def strip_wake_phrase(text):
+    """Removes a leading wake phrase from a transcript, e.g. 'Pragati, open feedback.' -> 'open feedback.'"""
+    return WAKE_PREFIX_RE.sub("", text, count=1).strip()
+
+
+class ListenerCpuMeter:
+    """
+    Splits this process's CPU time (Whisper, VAD and the gate all run in it;
+    Gemma has its own process) between waiting for the wake word ('idle') and
+    handling a command ('active'), so the saving can be checked on lab PCs.
+    """
+
+    def __init__(self, report_every_s=300):
+        self.totals = {"idle": [0.0, 0.0], "active": [0.0, 0.0]}
+        self.state = None
+        self.report_every_s = report_every_s
+        self.last_report = time.monotonic()
+
+    def enter(self, state):
+        now_wall, now_cpu = time.monotonic(), time.process_time()
+        if self.state is not None:
+            self.totals[self.state][0] += now_wall - self.wall_started
+            self.totals[self.state][1] += now_cpu - self.cpu_started
+        self.state, self.wall_started, self.cpu_started = state, now_wall, now_cpu
+
+    def summary(self, spotter=None):
+        parts = []
+        for state, (wall, cpu) in self.totals.items():
+            share = 100.0 * cpu / wall if wall else 0.0
+            parts.append(f"{state} {wall:.1f}s wall / {cpu:.1f}s CPU ({share:.1f}% of a core)")
+        if spotter:
+            parts.append(f"gate passed {spotter.accepted}/{spotter.checked} utterances")
+        return "; ".join(parts)
+
+    def maybe_report(self, spotter=None, force=False):
+        if force or time.monotonic() - self.last_report >= self.report_every_s:
+            self.enter(self.state)
+            print(f"WAKE_WORD_CPU: {self.summary(spotter)}")
+            self.last_report = time.monotonic()
@@ -0,0 +1,32 @@
+# warm_tts_cache.py
+"""
+Pre-renders the app's fixed spoken phrases into the TTS cache. Run once after
+installing (and again after changing the Piper voice).
+
+Usage: python warm_tts_cache.py
+"""
+
+import time
+
+import numpy as np
+from piper.voice import PiperVoice
+
+from tts_config import PIPER_MODEL_PATH, TTS_WARMUP_PHRASES
+from tts_cache import TtsCache
+
+
+def main():
+    voice = PiperVoice.load(PIPER_MODEL_PATH)
+    cache = TtsCache(PIPER_MODEL_PATH)
+
+    def synthesize(text):
+        return np.concatenate([chunk.audio_int16_array for chunk in voice.synthesize(text)])
+
+    started = time.perf_counter()
+    rendered = cache.warm_up(TTS_WARMUP_PHRASES, synthesize)
+    print(f"Rendered {rendered} of {len(TTS_WARMUP_PHRASES)} phrases in {time.perf_counter() - started:.1f}s "
+          f"({len(TTS_WARMUP_PHRASES) - rendered} were already cached).")
+
+
+if __name__ == "__main__":
+    main()
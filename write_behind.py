@@ -0,0 +1,181 @@
+# write_behind.py
+
+import atexit
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import database_manager as db
+import feedback_manager
+from db_connection import DB_FILE, get_connection
+
+FLUSH_INTERVAL_S = 1.0
+# A batch this big is written straight away instead of waiting for the timer.
+MAX_BATCH = 256
+# "database is locked" means another thread held the write lock for longer
+# than busy_timeout; the batch is kept and tried again this many times.
+MAX_RETRIES = 5
+RETRY_DELAY_S = 0.5
+
+OP_ADD_MESSAGE = "add_message"
+OP_REMOVE_LAST_MESSAGE = "remove_last_message"
+OP_SAVE_FEEDBACK = "save_feedback"
+
+PendingWrite = namedtuple("PendingWrite", ["op", "user_id", "args"])
+
+
+def coalesce(writes):
+    """
+    Drops each remove-last-message together with the still-unwritten message
+    it would delete, so neither reaches the database. Order is kept otherwise.
+    Returns (writes, number of pairs dropped).
+    """
+    kept, dropped = [], 0
+    for write in writes:
+        if write.op == OP_REMOVE_LAST_MESSAGE:
+            for i in range(len(kept) - 1, -1, -1):
+                if kept[i].op == OP_ADD_MESSAGE and kept[i].user_id == write.user_id:
+                    del kept[i]
+                    dropped += 1
+                    break
+            else:
+                kept.append(write)
+        else:
+            kept.append(write)
+    return kept, dropped
+
+
+class WriteBehindQueue:
+    """
+    Takes conversation and feedback writes off the calling thread. A worker
+    writes everything queued since its last pass in one transaction, at most
+    FLUSH_INTERVAL_S after the first write arrived. flush() is the barrier for
+    reads that must see every earlier write, and close() (also registered with
+    atexit) writes what is left and checkpoints the WAL into the database file.
+    """
+
+    def __init__(self, db_file=DB_FILE, flush_interval=FLUSH_INTERVAL_S):
+        self.db_file = db_file
+        self.flush_interval = flush_interval
+        self.pending = []  # PendingWrites, and the Events of flush() calls waiting on them
+        self.condition = threading.Condition()
+        self.urgent = False
+        self.closed = False
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+        atexit.register(self.close)
+
+    def _enqueue(self, item, urgent=False):
+        with self.condition:
+            if not self.closed:
+                self.pending.append(item)
+                if urgent or len(self.pending) >= MAX_BATCH:
+                    self.urgent = True
+                self.condition.notify()
+                return
+        # Once closed (e.g. a thread still finishing during shutdown), write straight through.
+        self._write([item])
+
+    def add_message(self, user_id, role, content):
+        """Queues a history message, stamped with the time it was said rather than written."""
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self._enqueue(PendingWrite(OP_ADD_MESSAGE, user_id, (role, content, timestamp)))
+
+    def remove_last_message(self, user_id):
+        self._enqueue(PendingWrite(OP_REMOVE_LAST_MESSAGE, user_id, ()))
+
+    def save_feedback(self, user_id, pydantic_rows):
+        if not pydantic_rows:
+            print("No validated feedback rows to save.")
+            return
+        self._enqueue(PendingWrite(OP_SAVE_FEEDBACK, user_id, (pydantic_rows,)))
+
+    def flush(self, timeout=None):
+        """Blocks until everything queued before this call is committed. Returns False on timeout."""
+        done = threading.Event()
+        self._enqueue(done, urgent=True)
+        if done.wait(timeout):
+            return True
+        print(f"WRITE_BEHIND_ERROR: Writes still pending after {timeout} s; reading without them.")
+        return False
+
+    def close(self, timeout=10.0):
+        """Writes everything still queued and stops the worker. Safe to call more than once."""
+        with self.condition:
+            self.closed = True
+            self.urgent = True
+            self.condition.notify()
+        self.worker.join(timeout)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed)
+                # Give later writes until the flush interval to join this batch.
+                self.condition.wait_for(lambda: self.urgent or self.closed, timeout=self.flush_interval)
+                batch, self.pending = self.pending, []
+                self.urgent = False
+                closing = self.closed
+            if batch:
+                self._write(batch)
+            if closing:
+                with self.condition:
+                    if self.pending:
+                        continue
+                self._checkpoint()
+                return
+
+    def _write(self, batch):
+        writes = [item for item in batch if isinstance(item, PendingWrite)]
+        barriers = [item for item in batch if not isinstance(item, PendingWrite)]
+        try:
+            writes, dropped = coalesce(writes)
+            for attempt in range(1, MAX_RETRIES + 1):
+                try:
+                    self._apply(writes)
+                    if writes or dropped:
+                        print(f"WRITE_BEHIND: Committed {len(writes)} writes ({dropped} insert/delete pairs skipped).")
+                    break
+                except sqlite3.OperationalError as e:
+                    print(f"WRITE_BEHIND_ERROR: Batch of {len(writes)} writes failed (attempt {attempt}): {e}")
+                    time.sleep(RETRY_DELAY_S)
+            else:
+                print(f"WRITE_BEHIND_ERROR: Gave up on {len(writes)} writes after {MAX_RETRIES} attempts.")
+        except Exception as e:
+            # Anything else (a bad row, a failed model_dump) fails the same way
+            # on retry; write the batch one by one so only the bad writes are lost.
+            print(f"WRITE_BEHIND_ERROR: Batch of {len(writes)} writes failed, writing them one at a time: {e}")
+            self._write_each(writes)
+        finally:
+            for done in barriers:
+                done.set()
+
+    def _write_each(self, writes):
+        for write in writes:
+            try:
+                self._apply([write])
+            except Exception as e:
+                print(f"WRITE_BEHIND_ERROR: Dropping {write.op} for user {write.user_id}: {e}")
+
+    def _apply(self, writes):
+        conn = get_connection(self.db_file)
+        with conn:
+            cursor = conn.cursor()
+            for write in writes:
+                if write.op == OP_ADD_MESSAGE:
+                    role, content, timestamp = write.args
+                    db.insert_message(cursor, write.user_id, role, content, timestamp)
+                elif write.op == OP_REMOVE_LAST_MESSAGE:
+                    db.delete_last_message(cursor, write.user_id)
+                elif write.op == OP_SAVE_FEEDBACK:
+                    feedback_manager.insert_feedback_rows(cursor, write.user_id, *write.args)
+
+    def _checkpoint(self):
+        # Commits already survive an app crash in WAL mode with synchronous=NORMAL;
+        # the checkpoint syncs them into the main file so they survive a power cut too.
+        try:
+            get_connection(self.db_file).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            print(f"WRITE_BEHIND_ERROR: Checkpoint failed: {e}")